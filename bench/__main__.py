@@ -0,0 +1,113 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+# Let `python -m bench` resolve the flat imports below just like `python bench` does
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+
+from fakes import FakeOpenProject, FakeGitHub, FakeBackboard
+from harness import BackgroundServer, addServerArguments, freePort, percentile, serverEnv, startServer
+from scenarios import SCENARIOS
+
+
+async def drive(url: str, scenario: str, requests: int, concurrency: int, timeout: float) -> dict:
+    latencies, errors = [], 0
+    counter = iter(range(requests))
+
+    async def worker(client: httpx.AsyncClient, slot: int):
+        nonlocal errors
+        # One session per worker, like a user sending messages one after another
+        for n in counter:
+            started = time.perf_counter()
+            try:
+                r = await client.post(f"{url}/sendMessage", json={
+                    "message": f"[bench:{scenario}:{n}] benchmark request",
+                    "sessionId": f"bench-{scenario}-{slot}",
+                })
+                ok = r.status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    async with httpx.AsyncClient(timeout=timeout) as client:
+        await asyncio.gather(*(worker(client, slot) for slot in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "requests": requests,
+        "errors": errors,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+    }
+
+
+def report(results: dict, services: list):
+    header = f"{'scenario':<16}{'reqs':>6}{'errs':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>9}"
+    header += "".join(f"{s.name + '/req':>16}" for s in services)
+    print(header)
+    for scenario, r in results.items():
+        line = f"{scenario:<16}{r['requests']:>6}{r['errors']:>6}{r['p50'] * 1000:>10.1f}{r['p95'] * 1000:>10.1f}{r['p99'] * 1000:>10.1f}{r['rps']:>9.1f}"
+        line += "".join(f"{r['calls'][s.name]['total'] / max(1, r['requests']):>16.2f}" for s in services)
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the server against local stand-ins for OpenProject, GitHub and Backboard")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="Scenario to run (repeatable, default: all)")
+    parser.add_argument("--requests", type=int, default=50, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight at once")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="Seconds added to every Backboard call")
+    addServerArguments(parser)
+    args = parser.parse_args()
+
+    services = [
+        FakeOpenProject(args.openproject_latency),
+        FakeGitHub(args.github_latency),
+        FakeBackboard(args.llm_latency),
+    ]
+    servers = [BackgroundServer(service.app(), freePort()) for service in services]
+    for server in servers:
+        server.start()
+
+    workdir = tempfile.mkdtemp(prefix="bench-")
+    env = serverEnv(servers, workdir)
+
+    log = open(os.path.join(workdir, "server.log"), "w")
+    print("Server log:", log.name)
+    process = startServer(args, env, log)
+
+    results = {}
+    try:
+        for scenario in args.scenario or list(SCENARIOS):
+            for service in services:
+                service.reset()
+            result = asyncio.run(drive(f"http://127.0.0.1:{args.port}", scenario, args.requests, args.concurrency, args.timeout))
+            result["calls"] = {s.name: {"total": s.total(), **s.calls} for s in services}
+            results[scenario] = result
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+        log.close()
+        for server in servers:
+            server.stop()
+
+    report(results, services)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
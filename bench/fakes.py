@@ -0,0 +1,490 @@
+import asyncio
+import base64
+import datetime
+import hashlib
+import io
+import itertools
+import json
+import re
+import tarfile
+import threading
+import time
+import urllib.parse
+import uuid
+from collections import Counter
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, Response
+from starlette.routing import Route
+
+from scenarios import SCENARIOS, FINAL_MESSAGE, REPO, REPO_FILES, SEED_PROJECT, SEED_TASKS
+
+
+# Stand-ins for OpenProject, GitHub and Backboard implementing just the endpoints
+# the server calls. Each one sleeps `latency` seconds per request and counts the
+# calls it serves so the benchmark can report outbound traffic per scenario.
+
+
+class FakeService:
+    def __init__(self, name: str, latency: float = 0.0):
+        self.name = name
+        self.latency = latency
+        self.calls = Counter()
+        self._lock = threading.Lock()
+
+    async def hit(self, endpoint: str):
+        with self._lock:
+            self.calls[endpoint] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    def reset(self):
+        with self._lock:
+            self.calls.clear()
+
+    def total(self) -> int:
+        with self._lock:
+            return sum(self.calls.values())
+
+
+def _now() -> str:
+    return datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+
+# --- OpenProject -----------------------------------------------------------
+class FakeOpenProject(FakeService):
+    """With autoCreate, lookups of unknown projects and work packages create them
+    on the spot, so replayed traces find whatever the original run found."""
+
+    def __init__(self, latency: float = 0.0, autoCreate: bool = False):
+        super().__init__("openproject", latency)
+        self.autoCreate = autoCreate
+        self.projects = {}
+        self.workPackages = {}
+        self.relations = []
+        self._ids = itertools.count(1)
+        self._stateLock = threading.Lock()
+
+        seed = self._addProject(SEED_PROJECT)
+        for subject in SEED_TASKS:
+            self._addWorkPackage(seed["id"], {"subject": subject})
+
+    def _addProject(self, name: str, body: dict = None) -> dict:
+        body = body or {}
+        project = {
+            "_type": "Project",
+            "id": next(self._ids),
+            "name": name,
+            "identifier": body.get("identifier") or name.lower().replace(" ", "-"),
+            "public": body.get("public", True),
+            "description": body.get("description", {"format": "markdown", "raw": ""}),
+            "updatedAt": _now(),
+        }
+        self.projects[project["id"]] = project
+        return project
+
+    def _addWorkPackage(self, projectId: int, body: dict) -> dict:
+        workPackage = {
+            "_type": "WorkPackage",
+            "id": next(self._ids),
+            "lockVersion": 0,
+            "subject": body.get("subject", ""),
+            "description": body.get("description", {"format": "markdown", "raw": ""}),
+            "startDate": body.get("startDate"),
+            "dueDate": body.get("dueDate"),
+            "updatedAt": _now(),
+            "_links": {"project": {"href": f"/api/v3/projects/{projectId}"}, **body.get("_links", {})},
+        }
+        self.workPackages[workPackage["id"]] = workPackage
+        return workPackage
+
+    @staticmethod
+    def _filterValue(request: Request, field: str):
+        try:
+            filters = json.loads(request.query_params.get("filters", "[]"))
+        except ValueError:
+            return None
+        for f in filters:
+            if field in f:
+                return f[field]["values"][0]
+        return None
+
+    @staticmethod
+    def _collection(elements: list, request: Request = None) -> dict:
+        # Paged like OpenProject when asked to (offset is the 1-based page number)
+        params = request.query_params if request is not None else {}
+        pageSize = int(params.get("pageSize") or max(1, len(elements)))
+        offset = int(params.get("offset") or 1)
+        page = elements[(offset - 1) * pageSize:offset * pageSize]
+        return {"_type": "Collection", "total": len(elements), "count": len(page), "_embedded": {"elements": page}}
+
+    async def list_projects(self, request: Request):
+        await self.hit("GET /api/v3/projects")
+        name = self._filterValue(request, "name_and_identifier") or ""
+        value = name.lower()
+        with self._stateLock:
+            elements = [p for p in self.projects.values() if value in p["name"].lower() or value in p["identifier"]]
+            if not elements and name and self.autoCreate:
+                elements = [self._addProject(name)]
+        return JSONResponse(self._collection(elements, request))
+
+    async def create_project(self, request: Request):
+        await self.hit("POST /api/v3/projects")
+        body = await request.json()
+        with self._stateLock:
+            if any(p["identifier"] == body.get("identifier") for p in self.projects.values()):
+                return JSONResponse({"_type": "Error", "message": "Identifier has already been taken."}, status_code=422)
+            project = self._addProject(body["name"], body)
+        return JSONResponse(project, status_code=201)
+
+    async def update_project(self, request: Request):
+        await self.hit("PATCH /api/v3/projects/{id}")
+        body = await request.json()
+        with self._stateLock:
+            project = self.projects.get(int(request.path_params["id"]))
+            if project is None:
+                return JSONResponse({"_type": "Error", "message": "Not found"}, status_code=404)
+            project.update({k: v for k, v in body.items() if k != "_type"})
+            project["updatedAt"] = _now()
+        return JSONResponse(project)
+
+    async def list_work_packages(self, request: Request):
+        await self.hit("GET /api/v3/projects/{id}/work_packages")
+        projectHref = f"/api/v3/projects/{request.path_params['id']}"
+        name = self._filterValue(request, "subject") or ""
+        subject = name.lower()
+        with self._stateLock:
+            elements = [
+                wp for wp in self.workPackages.values()
+                if wp["_links"]["project"]["href"] == projectHref and subject in wp["subject"].lower()
+            ]
+            if not elements and name and self.autoCreate:
+                elements = [self._addWorkPackage(request.path_params["id"], {"subject": name})]
+        return JSONResponse(self._collection(elements, request))
+
+    async def list_all_work_packages(self, request: Request):
+        await self.hit("GET /api/v3/work_packages")
+        # Only the updatedAt filter the mirror sends ("<>d" with [since, ""])
+        since = self._filterValue(request, "updatedAt") or ""
+        with self._stateLock:
+            elements = sorted((wp for wp in self.workPackages.values() if wp["updatedAt"] >= since), key=lambda wp: wp["updatedAt"])
+        return JSONResponse(self._collection(elements, request))
+
+    async def create_work_package(self, request: Request):
+        await self.hit("POST /api/v3/projects/{id}/work_packages")
+        body = await request.json()
+        with self._stateLock:
+            if int(request.path_params["id"]) not in self.projects:
+                return JSONResponse({"_type": "Error", "message": "Not found"}, status_code=404)
+            workPackage = self._addWorkPackage(int(request.path_params["id"]), body)
+        return JSONResponse(workPackage, status_code=201)
+
+    async def get_work_package(self, request: Request):
+        await self.hit("GET /api/v3/work_packages/{id}")
+        with self._stateLock:
+            workPackage = self.workPackages.get(int(request.path_params["id"]))
+        if workPackage is None:
+            return JSONResponse({"_type": "Error", "message": "Not found"}, status_code=404)
+        return JSONResponse(workPackage)
+
+    async def update_work_package(self, request: Request):
+        await self.hit("PATCH /api/v3/work_packages/{id}")
+        body = await request.json()
+        with self._stateLock:
+            workPackage = self.workPackages.get(int(request.path_params["id"]))
+            if workPackage is None:
+                return JSONResponse({"_type": "Error", "message": "Not found"}, status_code=404)
+            if body.get("lockVersion") != workPackage["lockVersion"]:
+                return JSONResponse({"_type": "Error", "errorIdentifier": "urn:openproject-org:api:v3:errors:UpdateConflict"}, status_code=409)
+            links = body.pop("_links", {})
+            workPackage.update({k: v for k, v in body.items() if k != "lockVersion"})
+            workPackage["_links"].update(links)
+            workPackage["lockVersion"] += 1
+            workPackage["updatedAt"] = _now()
+        return JSONResponse(workPackage)
+
+    # Instance metadata: stock OpenProject priorities, a few statuses and types
+    PRIORITIES = [("Low", False), ("Normal", True), ("High", False), ("Immediate", False)]
+    STATUSES = [("New", False), ("In progress", False), ("Closed", True), ("Rejected", True)]
+    TYPES = [("Task", True), ("Milestone", False), ("Bug", False)]
+
+    @staticmethod
+    def _enumeration(kind: str, rows: list, firstId: int) -> list[dict]:
+        flag = {"priorities": "isDefault", "statuses": "isClosed", "types": "isDefault"}[kind]
+        return [
+            {"id": firstId + i, "name": name, flag: value, "_links": {"self": {"href": f"/api/v3/{kind}/{firstId + i}", "title": name}}}
+            for i, (name, value) in enumerate(rows)
+        ]
+
+    async def list_priorities(self, request: Request):
+        await self.hit("GET /api/v3/priorities")
+        return JSONResponse(self._collection(self._enumeration("priorities", self.PRIORITIES, 7), request))
+
+    async def list_statuses(self, request: Request):
+        await self.hit("GET /api/v3/statuses")
+        return JSONResponse(self._collection(self._enumeration("statuses", self.STATUSES, 1), request))
+
+    async def list_types(self, request: Request):
+        await self.hit("GET /api/v3/types")
+        return JSONResponse(self._collection(self._enumeration("types", self.TYPES, 1), request))
+
+    async def work_package_form(self, request: Request):
+        await self.hit("POST /api/v3/work_packages/form")
+        return JSONResponse({"_type": "Form", "_embedded": {"payload": {}, "schema": {
+            "_type": "Schema",
+            "subject": {"type": "String", "required": True, "writable": True, "minLength": 1, "maxLength": 255},
+            "startDate": {"type": "Date", "required": False, "writable": True},
+            "dueDate": {"type": "Date", "required": False, "writable": True},
+        }}})
+
+    async def list_relations(self, request: Request):
+        await self.hit("GET /api/v3/relations")
+        involved = set()
+        for f in json.loads(request.query_params.get("filters", "[]")):
+            if "involved" in f:
+                involved.update(f"/api/v3/work_packages/{wpId}" for wpId in f["involved"]["values"])
+        with self._stateLock:
+            elements = [r for r in self.relations if {r["_links"]["from"]["href"], r["_links"]["to"]["href"]} & involved]
+        return JSONResponse(self._collection(elements, request))
+
+    def app(self) -> Starlette:
+        return Starlette(routes=[
+            Route("/api/v3/projects", self.list_projects, methods=["GET"]),
+            Route("/api/v3/projects", self.create_project, methods=["POST"]),
+            Route("/api/v3/projects/{id:int}", self.update_project, methods=["PATCH"]),
+            Route("/api/v3/projects/{id:int}/work_packages", self.list_work_packages, methods=["GET"]),
+            Route("/api/v3/projects/{id:int}/work_packages", self.create_work_package, methods=["POST"]),
+            Route("/api/v3/work_packages", self.list_all_work_packages, methods=["GET"]),
+            Route("/api/v3/work_packages/{id:int}", self.get_work_package, methods=["GET"]),
+            Route("/api/v3/work_packages/{id:int}", self.update_work_package, methods=["PATCH"]),
+            Route("/api/v3/relations", self.list_relations, methods=["GET"]),
+            Route("/api/v3/priorities", self.list_priorities, methods=["GET"]),
+            Route("/api/v3/statuses", self.list_statuses, methods=["GET"]),
+            Route("/api/v3/types", self.list_types, methods=["GET"]),
+            Route("/api/v3/work_packages/form", self.work_package_form, methods=["POST"]),
+        ])
+
+
+# --- GitHub ----------------------------------------------------------------
+class FakeGitHub(FakeService):
+    """Serves REPO_FILES as REPO. With anyRepo every repository name is accepted
+    and unknown paths get a small generated file instead of a 404."""
+
+    def __init__(self, latency: float = 0.0, anyRepo: bool = False):
+        super().__init__("github", latency)
+        self.anyRepo = anyRepo
+        self.files = dict(REPO_FILES)
+        self.sha = hashlib.sha1(json.dumps(self.files, sort_keys=True).encode()).hexdigest()
+        self._tarball = self._buildTarball()
+
+    def _buildTarball(self) -> bytes:
+        data = io.BytesIO()
+        with tarfile.open(fileobj=data, mode="w:gz") as tar:
+            for path, text in self.files.items():
+                encoded = text.encode()
+                info = tarfile.TarInfo(f"{REPO.replace('/', '-')}-{self.sha[:7]}/{path}")
+                info.size = len(encoded)
+                tar.addfile(info, io.BytesIO(encoded))
+        return data.getvalue()
+
+    def _headers(self, resource: str = "core") -> dict:
+        # Generous limits so pacing never kicks in unless a scenario wants it to
+        return {
+            "X-RateLimit-Resource": resource,
+            "X-RateLimit-Limit": "100000",
+            "X-RateLimit-Remaining": "99999",
+            "X-RateLimit-Reset": str(int(time.time()) + 3600),
+            "ETag": f'"{self.sha}"',
+        }
+
+    def _notModified(self, request: Request) -> bool:
+        return request.headers.get("If-None-Match") == f'"{self.sha}"'
+
+    def _repo(self, request: Request) -> bool:
+        return self.anyRepo or f"{request.path_params['owner']}/{request.path_params['repo']}" == REPO
+
+    def _file(self, path: str):
+        if path not in self.files and self.anyRepo:
+            return "".join(f"// {path} line {i}\n" for i in range(40))
+        return self.files.get(path)
+
+    async def get_commit(self, request: Request):
+        await self.hit("GET /repos/{repo}/commits/{ref}")
+        if not self._repo(request):
+            return JSONResponse({"message": "Not Found"}, status_code=404, headers=self._headers())
+        if self._notModified(request):
+            return Response(status_code=304, headers=self._headers())
+        if "vnd.github.sha" in request.headers.get("Accept", ""):
+            return PlainTextResponse(self.sha, headers=self._headers())
+        return JSONResponse({"sha": self.sha}, headers=self._headers())
+
+    async def get_contents(self, request: Request):
+        await self.hit("GET /repos/{repo}/contents/{path}")
+        path = request.path_params["path"]
+        text = self._file(path) if self._repo(request) else None
+        if text is None:
+            return JSONResponse({"message": "Not Found"}, status_code=404, headers=self._headers())
+        if self._notModified(request):
+            return Response(status_code=304, headers=self._headers())
+        if "vnd.github.raw" in request.headers.get("Accept", ""):
+            return PlainTextResponse(text, headers=self._headers())
+        return JSONResponse({
+            "type": "file",
+            "path": path,
+            "encoding": "base64",
+            "content": base64.b64encode(text.encode()).decode(),
+            "html_url": f"https://github.com/{REPO}/blob/{self.sha}/{path}",
+            "download_url": None,
+        }, headers=self._headers())
+
+    async def get_tarball(self, request: Request):
+        await self.hit("GET /repos/{repo}/tarball/{ref}")
+        if not self._repo(request):
+            return JSONResponse({"message": "Not Found"}, status_code=404, headers=self._headers())
+        return Response(self._tarball, media_type="application/x-gzip", headers=self._headers())
+
+    async def compare(self, request: Request):
+        await self.hit("GET /repos/{repo}/compare/{range}")
+        return JSONResponse({"status": "identical", "files": []}, headers=self._headers())
+
+    async def search_code(self, request: Request):
+        await self.hit("GET /search/code")
+        terms = [t for t in request.query_params.get("q", "").split() if not t.startswith("repo:")]
+        limit = int(request.query_params.get("per_page", 30))
+        items = [
+            {"path": path, "name": path.rsplit("/", 1)[-1], "html_url": f"https://github.com/{REPO}/blob/{self.sha}/{path}", "repository": {"full_name": REPO}}
+            for path, text in self.files.items()
+            if all(t.lower() in text.lower() for t in terms)
+        ][:limit]
+        return JSONResponse({"total_count": len(items), "items": items}, headers=self._headers("search"))
+
+    async def graphql(self, request: Request):
+        await self.hit("POST /graphql")
+        body = await request.json()
+        variables = body.get("variables", {})
+        repository = {}
+        for name, expression in variables.items():
+            if not re.fullmatch(r"e\d+", name):
+                continue
+            path = expression.split(":", 1)[-1]
+            text = self._file(path)
+            repository[f"f{name[1:]}"] = None if text is None else {
+                "text": text, "byteSize": len(text.encode()), "isBinary": False, "isTruncated": False
+            }
+        return JSONResponse({"data": {"repository": repository}}, headers=self._headers("graphql"))
+
+    def app(self) -> Starlette:
+        return Starlette(routes=[
+            Route("/repos/{owner}/{repo}/commits/{ref}", self.get_commit, methods=["GET"]),
+            Route("/repos/{owner}/{repo}/contents/{path:path}", self.get_contents, methods=["GET"]),
+            Route("/repos/{owner}/{repo}/tarball/{ref}", self.get_tarball, methods=["GET"]),
+            Route("/repos/{owner}/{repo}/compare/{range}", self.compare, methods=["GET"]),
+            Route("/search/code", self.search_code, methods=["GET"]),
+            Route("/graphql", self.graphql, methods=["POST"]),
+        ])
+
+
+# --- Backboard -------------------------------------------------------------
+MARKER_RE = re.compile(r"\[bench:(\w+):(\d+)\]")
+
+
+def _fill(value, n: str):
+    """Substitute the request number into every string of a scripted tool call."""
+    if isinstance(value, str):
+        return value.replace("{n}", n)
+    if isinstance(value, list):
+        return [_fill(v, n) for v in value]
+    if isinstance(value, dict):
+        return {k: _fill(v, n) for k, v in value.items()}
+    return value
+
+
+class FakeBackboard(FakeService):
+    """Plays back scripts (SCENARIOS by default): every message names its script
+    and request number in a [bench:<script>:<n>] marker, each round of scripted
+    tool calls is answered with REQUIRES_ACTION until the script runs out.
+
+    delays optionally gives, per script, how long each response takes (one
+    entry per Backboard call), divided by speed; otherwise latency applies.
+    """
+
+    def __init__(self, latency: float = 0.0, scripts: dict = None, delays: dict = None, speed: float = 1.0):
+        super().__init__("backboard", latency)
+        self.scripts = scripts if scripts is not None else SCENARIOS
+        self.delays = delays or {}
+        self.speed = speed
+        self._runs = {}
+        self._stateLock = threading.Lock()
+
+    async def _pace(self, scenario: str, index: int):
+        delays = self.delays.get(scenario)
+        if delays and index < len(delays) and self.speed > 0:
+            await asyncio.sleep(delays[index] / self.speed)
+
+    async def _step(self, threadId: str, runId: str) -> dict:
+        with self._stateLock:
+            scenario, n, index = self._runs.pop(runId)
+        await self._pace(scenario, index)
+        rounds = self.scripts.get(scenario, [])
+        message = {
+            "thread_id": threadId,
+            "run_id": runId,
+            "role": "assistant",
+            "timestamp": _now(),
+            "context_usage": {"percent": 1.0, "used_tokens": 100, "context_limit": 10000, "summary_tokens": 0, "model": "fake"},
+        }
+
+        if index < len(rounds):
+            with self._stateLock:
+                self._runs[runId] = (scenario, n, index + 1)
+            message.update({
+                "status": "REQUIRES_ACTION",
+                "content": None,
+                "tool_calls": [
+                    {"id": f"call_{uuid.uuid4().hex[:12]}", "type": "function", "function": {"name": name, "arguments": json.dumps(_fill(args, n))}}
+                    for name, args in rounds[index]
+                ],
+            })
+        else:
+            message.update({"status": "COMPLETED", "content": FINAL_MESSAGE, "tool_calls": None})
+        return message
+
+    async def create_assistant(self, request: Request):
+        await self.hit("POST /assistants")
+        body = await request.json()
+        return JSONResponse({"assistant_id": str(uuid.uuid4()), "name": body.get("name", ""), "created_at": _now()})
+
+    async def create_thread(self, request: Request):
+        await self.hit("POST /assistants/{id}/threads")
+        return JSONResponse({"thread_id": str(uuid.uuid4()), "created_at": _now(), "messages": []})
+
+    async def add_message(self, request: Request):
+        await self.hit("POST /threads/messages")
+        # add_message posts url-encoded form data, parsed by hand to avoid needing python-multipart
+        form = {k: v[0] for k, v in urllib.parse.parse_qs((await request.body()).decode()).items()}
+        match = MARKER_RE.search(form.get("content", ""))
+        scenario, n = (match.group(1), match.group(2)) if match and match.group(1) in self.scripts else ("chat", "0")
+
+        runId = uuid.uuid4().hex
+        with self._stateLock:
+            self._runs[runId] = (scenario, n, 0)
+        message = await self._step(form["thread_id"], runId)
+        context = message.pop("context_usage")
+        return JSONResponse({"messages": [message], "context_usage": context})
+
+    async def submit_tool_outputs(self, request: Request):
+        await self.hit("POST /threads/{id}/runs/{run}/submit-tool-outputs")
+        await request.json()
+        if request.path_params["run"] not in self._runs:
+            return JSONResponse({"detail": "Unknown run"}, status_code=404)
+        message = await self._step(request.path_params["id"], request.path_params["run"])
+        return JSONResponse({"message": "ok", **message})
+
+    def app(self) -> Starlette:
+        return Starlette(routes=[
+            Route("/assistants", self.create_assistant, methods=["POST"]),
+            Route("/assistants/{id}/threads", self.create_thread, methods=["POST"]),
+            Route("/threads/messages", self.add_message, methods=["POST"]),
+            Route("/threads/{id}/runs/{run}/submit-tool-outputs", self.submit_tool_outputs, methods=["POST"]),
+        ])
@@ -0,0 +1,95 @@
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import httpx
+import uvicorn
+
+
+# Shared plumbing for the scenario benchmark (__main__.py) and the trace replayer (replay.py)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def freePort() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class BackgroundServer:
+    """Runs an ASGI app with uvicorn on a daemon thread."""
+
+    def __init__(self, app, port: int):
+        self.port = port
+        self.server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", access_log=False))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+
+    def stop(self):
+        self.server.should_exit = True
+        self.thread.join(timeout=5)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+
+def percentile(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(p / 100 * len(ordered) + 0.5) - 1))]
+
+
+def serverEnv(servers: list, workdir: str) -> dict:
+    """Environment pointing the server at the fakes (OpenProject, GitHub, Backboard order)."""
+    openprojectServer, githubServer, backboardServer = servers
+    return {
+        **os.environ,
+        "OPENPROJECT_URL": openprojectServer.url,
+        "GITHUB_API_URL": githubServer.url,
+        "BACKBOARD_URL": backboardServer.url,
+        "OPENPROJECT_API_KEY": "bench",
+        "GITHUB_TOKEN": "bench",
+        "BACKBOARD_API_KEY": "bench",
+        # Fresh caches and registry so every benchmark starts cold, and never record the benchmark itself
+        "GITHUB_CACHE_DIR": os.path.join(workdir, "github"),
+        "REGISTRY_PATH": os.path.join(workdir, "registry.json"),
+        "TRACE_DIR": "",
+    }
+
+
+def startServer(args, env: dict, log) -> subprocess.Popen:
+    command = [sys.executable, "-m", "server", "--port", str(args.port)]
+    if args.asgi:
+        command += ["--asgi"]
+    process = subprocess.Popen(command, cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with status {process.returncode}, see {log.name}")
+        try:
+            if httpx.get(f"http://127.0.0.1:{args.port}/metrics", timeout=1).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"Server did not start, see {log.name}")
+
+
+def addServerArguments(parser):
+    parser.add_argument("--openproject-latency", type=float, default=0.02, help="Seconds added to every OpenProject call")
+    parser.add_argument("--github-latency", type=float, default=0.05, help="Seconds added to every GitHub call")
+    parser.add_argument("--asgi", action="store_true", help="Benchmark the ASGI server instead of Flask")
+    parser.add_argument("--port", type=int, default=freePort())
+    parser.add_argument("--timeout", type=float, default=180, help="Per-request timeout in seconds")
+    parser.add_argument("--json", help="Also write the results to this file")
@@ -0,0 +1,146 @@
+import argparse
+import asyncio
+import glob
+import json
+import os
+import sys
+import tempfile
+import time
+
+# Let `python bench/replay.py` resolve the flat imports below
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+
+from fakes import FakeOpenProject, FakeGitHub, FakeBackboard
+from harness import BackgroundServer, addServerArguments, freePort, percentile, serverEnv, startServer
+
+
+# Re-executes traces recorded by the server (TRACE_DIR) against the local fakes.
+# The fake Backboard asks for exactly the tool calls each trace recorded and takes
+# as long as the original LLM calls did (divided by --speed), the tools themselves
+# really run against the fake OpenProject/GitHub. Requests are sent on the original
+# schedule (also divided by --speed) with at most --concurrency in flight.
+
+
+def loadTraces(paths: list[str]) -> list[dict]:
+    files = []
+    for path in paths:
+        files += sorted(glob.glob(os.path.join(path, "*.jsonl"))) if os.path.isdir(path) else [path]
+
+    traces = []
+    for name in files:
+        with open(name, encoding="utf-8") as f:
+            traces += [json.loads(line) for line in f if line.strip()]
+    return sorted(traces, key=lambda t: t["started"])
+
+
+def scripts(traces: list[dict]) -> tuple[dict, dict]:
+    rounds = {f"t{i}": [[(call["name"], call.get("args") or {}) for call in calls] for calls in trace["rounds"]] for i, trace in enumerate(traces)}
+    delays = {f"t{i}": trace["llm"] for i, trace in enumerate(traces)}
+    return rounds, delays
+
+
+async def replay(url: str, traces: list[dict], speed: float, concurrency: int, timeout: float) -> list[dict]:
+    semaphore = asyncio.Semaphore(concurrency)
+    first = traces[0]["started"] if traces else 0
+    results = [None] * len(traces)
+    began = time.perf_counter()
+
+    async def send(client: httpx.AsyncClient, i: int, trace: dict):
+        if speed > 0:
+            await asyncio.sleep(max(0.0, (trace["started"] - first) / speed - (time.perf_counter() - began)))
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                r = await client.post(f"{url}/sendMessage", json={
+                    "message": f"[bench:t{i}:{i}] {trace['message']}",
+                    "sessionId": f"replay-{trace['session']}",
+                })
+                ok = r.status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            results[i] = {"ok": ok, "seconds": time.perf_counter() - started}
+
+    async with httpx.AsyncClient(timeout=timeout) as client:
+        await asyncio.gather(*(send(client, i, trace) for i, trace in enumerate(traces)))
+
+    elapsed = time.perf_counter() - began
+    for result in results:
+        result["elapsed"] = elapsed
+    return results
+
+
+def report(traces: list[dict], results: list[dict], services: list, top: int):
+    latencies = [r["seconds"] for r in results if r["ok"]]
+    recorded = [t["seconds"] for t in traces if t.get("seconds") is not None]
+    elapsed = results[0]["elapsed"] if results else 0
+
+    print(f"{'':<10}{'runs':>6}{'errs':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>9}")
+    print(f"{'recorded':<10}{len(recorded):>6}{sum(1 for t in traces if t.get('error')):>6}"
+          f"{percentile(recorded, 50) * 1000:>10.1f}{percentile(recorded, 95) * 1000:>10.1f}{percentile(recorded, 99) * 1000:>10.1f}{'':>9}")
+    print(f"{'replayed':<10}{len(results):>6}{sum(1 for r in results if not r['ok']):>6}"
+          f"{percentile(latencies, 50) * 1000:>10.1f}{percentile(latencies, 95) * 1000:>10.1f}{percentile(latencies, 99) * 1000:>10.1f}"
+          f"{len(latencies) / elapsed if elapsed else 0:>9.1f}")
+
+    print()
+    for service in services:
+        print(f"{service.name}: {service.total()} calls ({service.total() / max(1, len(results)):.2f}/run)", dict(service.calls))
+
+    # The prompts that cost the most LLM rounds (and LLM time) in the original runs
+    print()
+    print(f"Top {top} prompts by LLM rounds:")
+    ranked = sorted(traces, key=lambda t: (len(t["rounds"]), sum(t["llm"])), reverse=True)[:top]
+    for trace in ranked:
+        tools = [call["name"] for calls in trace["rounds"] for call in calls]
+        print(f"  {len(trace['rounds']):>3} rounds {sum(trace['llm']):>7.1f}s llm  {len(tools):>3} tools  {trace['message'][:80]!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded conversation traces against local stand-ins")
+    parser.add_argument("traces", nargs="+", help="Trace files or directories of *.jsonl traces (TRACE_DIR)")
+    parser.add_argument("--speed", type=float, default=1.0, help="Time compression: 1 = original pacing, 10 = ten times faster, 0 = no waiting at all")
+    parser.add_argument("--concurrency", type=int, default=32, help="Most requests in flight at once")
+    parser.add_argument("--top", type=int, default=10, help="How many of the most round-hungry prompts to list")
+    addServerArguments(parser)
+    args = parser.parse_args()
+
+    traces = loadTraces(args.traces)
+    if not traces:
+        parser.error("no traces found")
+
+    rounds, delays = scripts(traces)
+    services = [
+        FakeOpenProject(args.openproject_latency, autoCreate=True),
+        FakeGitHub(args.github_latency, anyRepo=True),
+        FakeBackboard(scripts=rounds, delays=delays, speed=args.speed),
+    ]
+    servers = [BackgroundServer(service.app(), freePort()) for service in services]
+    for server in servers:
+        server.start()
+
+    workdir = tempfile.mkdtemp(prefix="replay-")
+    log = open(os.path.join(workdir, "server.log"), "w")
+    print("Server log:", log.name)
+    process = startServer(args, serverEnv(servers, workdir), log)
+
+    try:
+        # Setup traffic (assistant creation) is not part of the replay
+        for service in services:
+            service.reset()
+        results = asyncio.run(replay(f"http://127.0.0.1:{args.port}", traces, args.speed, args.concurrency, args.timeout))
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+        log.close()
+        for server in servers:
+            server.stop()
+
+    report(traces, results, services, args.top)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"results": results, "calls": {s.name: dict(s.calls) for s in services}}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# Scripted assistant runs played back by the fake Backboard.
+#
+# Each scenario is a list of REQUIRES_ACTION rounds, each round a list of
+# (tool name, arguments) calls. "{n}" in any argument string is replaced by
+# the request number so runs don't collide (e.g. one new project per request).
+
+SEED_PROJECT = "Bench seed"
+SEED_TASKS = [f"Seed task {i}" for i in range(1000)]
+
+REPO = "bench/app"
+REPO_FILES = {
+    "README.md": "# Bench app\n\nA small service used by the benchmark.\n\n## Setup\n\nnpm install && npm start\n",
+    "package.json": '{\n  "name": "bench-app",\n  "main": "src/server.js",\n  "dependencies": {"express": "^4.19.0"}\n}\n',
+    "src/server.js": "const express = require('express');\nconst routes = require('./routes');\n\nconst app = express();\nroutes.register(app);\napp.listen(3000);\n",
+    "src/routes.js": "".join(f"const handler{i} = require('./handlers/handler{i}');\n" for i in range(20)) + "exports.register = (app) => {};\n",
+    **{
+        f"src/handlers/handler{i}.js": f"// Handler {i}\nmodule.exports = function handler{i}(req, res) {{\n  res.json({{ id: {i} }});\n}};\n"
+        for i in range(20)
+    },
+}
+
+TASKS = [
+    {"subject": f"Task {i}", "description": f"Implement part {i}", "startDate": "2026-01-05", "dueDate": "2026-01-16", "priority": "medium"}
+    for i in range(10)
+]
+
+SCENARIOS = {
+    # No tool calls: the floor set by the server and the LLM round trip
+    "chat": [],
+
+    # A new project followed by its 10 tasks in one create_tasks call
+    "bootstrap": [
+        [("create_project", {"name": "Bench {n}", "description": "Benchmark project", "status_explanation": "Not started"})],
+        [("create_tasks", {"projectName": "Bench {n}", "tasks": TASKS})],
+    ],
+
+    # A new project with 10 tasks, then the whole project pushed back a week in one call
+    "reschedule": [
+        [("create_project", {"name": "Bench reschedule {n}", "description": "Benchmark project", "status_explanation": "Not started"})],
+        [("create_tasks", {"projectName": "Bench reschedule {n}", "tasks": TASKS})],
+        [("reschedule_project", {"projectName": "Bench reschedule {n}", "days": 7})],
+    ],
+
+    # Single edit of an existing task
+    "update_task": [
+        [("update_task", {"projectName": SEED_PROJECT, "subject": "Seed task {n}", "newDueDate": "2026-02-01"})],
+    ],
+
+    # Repository context: a batch of known files plus a code search
+    "github_context": [
+        [
+            ("github_get_files", {"repo": REPO, "files": [{"path": "README.md"}, {"path": "package.json"}, {"path": "src/server.js"}]}),
+            ("github_search_code", {"repo": REPO, "query": "handler"}),
+        ],
+    ],
+}
+
+FINAL_MESSAGE = "Done."
@@ -1,8 +1,21 @@
 const serverUrl = "http://localhost:8000/sendMessage";
+const streamUrl = "http://localhost:8000/sendMessage/stream";
 const htmlUrl = chrome.runtime.getURL("injected.html");
 
 let lastUrl = location.href;
 
+// Each browser gets its own conversation (Backboard thread) on the server
+function getSessionId() {
+  return new Promise((resolve) => {
+    chrome.storage.local.get(["sessionId"], (data) => {
+      if (data.sessionId) return resolve(data.sessionId);
+      const sessionId = crypto.randomUUID();
+      chrome.storage.local.set({ sessionId });
+      resolve(sessionId);
+    });
+  });
+}
+
 function injectChat() {
   // Prevent duplicate injection
   if (document.getElementById("chatBtn")) return;
@@ -51,34 +64,58 @@ function injectChat() {
         botMsg.innerHTML = `<strong>Bot:</strong> Thinking...`;
         chatHistory.appendChild(botMsg);
 
-        const response = await fetch(serverUrl, {
+        const response = await fetch(streamUrl, {
           method: "POST",
           headers: {
             "Content-Type": "application/json",
           },
           body: JSON.stringify({
             message: msg,
+            sessionId: await getSessionId(),
           }),
         });
-        const result = await response.json();
-        const message = result.message;
-
-        // Typing effect
-        let i = 0;
-        function typeChar() {
-          if (i <= message.length) {
-            botMsg.innerHTML = `<strong>Bot:</strong> ${message.slice(0, i)}<span class="typing-cursor">|</span>`;
-            chatHistory.scrollTop = chatHistory.scrollHeight;
-            i++;
-            setTimeout(typeChar, 30); // Adjust typing speed here (ms per char)
-          } else {
-            botMsg.innerHTML = `<strong>Bot:</strong> ${message}`;
-            chatHistory.scrollTop = chatHistory.scrollHeight;
-            saveChatHistory();
-            window.location.reload();
+
+        // Server-Sent Events: render tokens and tool progress as they arrive
+        let message = "";
+        let progress = [];
+        function render(cursor) {
+          const steps = progress.map((p) => `<div><em>${p}</em></div>`).join("");
+          botMsg.innerHTML = `<strong>Bot:</strong> ${steps}${message}${cursor ? '<span class="typing-cursor">|</span>' : ""}`;
+          chatHistory.scrollTop = chatHistory.scrollHeight;
+        }
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = "";
+        while (true) {
+          const { value, done } = await reader.read();
+          if (done) break;
+          buffer += decoder.decode(value, { stream: true });
+
+          let end;
+          while ((end = buffer.indexOf("\n\n")) !== -1) {
+            const raw = buffer.slice(0, end);
+            buffer = buffer.slice(end + 2);
+            const dataLine = raw.split("\n").find((l) => l.startsWith("data: "));
+            if (!dataLine) continue;
+            const event = JSON.parse(dataLine.slice(6));
+
+            if (event.type === "token") {
+              message += event.content;
+            } else if (event.type === "tool") {
+              progress.push(event.message);
+            } else if (event.error) {
+              message = `Error: ${event.error}`;
+            } else if (event.status === "ok") {
+              message = event.message;
+            }
+            render(true);
           }
         }
-        typeChar();
+
+        render(false);
+        saveChatHistory();
+        window.location.reload();
       }
 
       sendBtn.addEventListener("click", sendMessage);
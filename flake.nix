@@ -28,8 +28,10 @@
               pip install flask
               pip install flask-cors
               pip install python-dotenv
-              pip install requests
+              pip install httpx
               pip install backboard-sdk
+              pip install starlette
+              pip install uvicorn
             '';
           };
         }
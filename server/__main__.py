@@ -1,27 +1,24 @@
+import argparse
 import asyncio
+import functools
+import os
+import sys
 import threading
-import datetime
-from backboard import BackboardClient
+import queue
 
-from flask import Flask, json, request, jsonify
-from flask_cors import CORS
+# Let `python -m server` resolve the flat imports below just like `python server` does
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from config import BACKBOARD_API_KEY
-from tools.create_project import create_project_tool, create_project
-from tools.create_task import create_task_tool, create_task
-from tools.update_project import update_project_tool, update_project
-from tools.update_task import update_task_tool, update_task
+from flask import Flask, Response, request, jsonify
+from flask_cors import CORS
 
-# GitHub tools
-from tools.github_repo import (
-    github_search_code_tool,
-    github_get_file_tool,
-    github_search_code,
-    github_get_file
-)
+from config import CORS_ORIGINS
+from jobs import jobs
+from assistant import main, sendMessage, runJob, sse_event
+from metrics import requestSeconds, span, render, CONTENT_TYPE
 
 app = Flask(__name__)
-CORS(app, resources={r"/*": {"origins": ["https://openproject.chiem.me"]}})
+CORS(app, resources={r"/*": {"origins": CORS_ORIGINS}})
 
 # --- one persistent event loop ---
 loop = asyncio.new_event_loop()
@@ -34,43 +31,18 @@ threading.Thread(target=loop_runner, daemon=True).start()
 # --------------------------------
 
 
-# --- helpers to support tool_calls as objects OR dicts ---
-class _FnShim:
-    def __init__(self, name, parsed_arguments):
-        self.name = name
-        self.parsed_arguments = parsed_arguments
-
-class _ToolCallShim:
-    def __init__(self, tc_dict):
-        self.id = tc_dict.get("id")
-        fn = tc_dict.get("function", {}) or {}
-        name = fn.get("name")
-
-        parsed = fn.get("parsed_arguments", None)
-        if parsed is None or parsed == {}:
-            args_raw = fn.get("arguments", None)
-            if isinstance(args_raw, str) and args_raw.strip():
-                try:
-                    parsed = json.loads(args_raw)
-                except Exception:
-                    parsed = {}
-            elif isinstance(args_raw, dict):
-                parsed = args_raw
-            else:
-                parsed = {}
-
-        self.function = _FnShim(name, parsed)
-
-def _normalize_tool_call(tc):
-    if hasattr(tc, "function") and hasattr(tc, "id"):
-        return tc
-    if isinstance(tc, dict):
-        return _ToolCallShim(tc)
-    raise TypeError(f"Unsupported tool call type: {type(tc)}")
-# --------------------------------------------------------
+def timed(handler):
+    @functools.wraps(handler)
+    def wrapper(*args, **kwargs):
+        with span(requestSeconds, route=request.path) as labels:
+            response = app.make_response(handler(*args, **kwargs))
+            labels["status"] = response.status_code
+        return response
+    return wrapper
 
 
 @app.route("/sendMessage", methods=["POST"])
+@timed
 def receive_message():
     data = request.get_json()
 
@@ -78,139 +50,106 @@ def receive_message():
         return jsonify({"error": "Missing 'message' field"}), 400
 
     message = data["message"]
+    sessionId = str(data.get("sessionId") or request.headers.get("X-Session-Id") or "default")
+
+    # Async mode: hand back a job id right away, the run continues on the background loop
+    if data.get("async"):
+        job = jobs.create(sessionId)
+        if job is None:
+            return jsonify({"error": "Too many running jobs, try again later"}), 503
+
+        asyncio.run_coroutine_threadsafe(runJob(job, message), loop)
+        return jsonify({"status": "accepted", "jobId": job.id}), 202
 
-    future = asyncio.run_coroutine_threadsafe(sendMessage(message), loop)
+    info = {}
+    future = asyncio.run_coroutine_threadsafe(sendMessage(message, sessionId, info=info), loop)
     response = future.result(timeout=120)
 
     if response is None:
         response = ""
 
     print("Response:", response)
-    return jsonify({"status": "ok", "message": response}), 200
-
-
-async def sendMessage(message: str):
-    if message == "":
-        return ""
+    return jsonify({"status": "ok", "message": response, "info": info}), 200
 
-    # --- NEW: per-run limiter state ---
-    github_search_calls = 0
-    # -------------------------------
 
-    message += f" This is the end of the beginning message. Today's date is {datetime.datetime.now()}. Now, based on this message beginning, consider the following instructions (only consider one set of instructions based on what is present at the beginning of the message):"
-    
-    message += " If asked to create a new project at the beginning of this message, consider the following instructions in brakets: [For this project, define a name, description, a status explanation for a NOT STARTED status, and a whether the project should be public."
-    message += " If asked to at the beginning of this message, create important tasks for the project with a subject, description, start date, due date, and priority level (low, medium, high, immediate). Tasks should be tied to the developement of the project. (Tasks that require actual code implementation like setup authentication) Do not define tasks tied to business objectives like planning, launch or maintenance. Give at least 10 tasks that give a good overview of what should be done to implement this particular project. Also define a timeline for the project by choosing accordingly the start and due dates of each task.]"
-
-    message += " Otherwise, if asked to create a single task at the message beginning, consider the following instructions in brakets: [Create a new task. For this task, define a subject, description, start date, due date, and priority level (low, medium, high, immediate) based on what is present at the beginning of this message. Expand the description of the task to give more details about what needs to be done.]"
-
-    message += " Otherwise, if asked to update a project at the beginning of this message, consider the following instructions in brakets: [Update the specified project with any new details provided at the beginning of this message. Make sure to only update the fields that have been changed or added.]"
-
-    message += " Otherwise, if asked to update a task at the beginning of this message, consider the following instructions in brakets: [Update the specified task with any new details provided at the beginning of this message. Make sure to only update the fields that have been changed or added.]"
+@app.route("/sendMessage/stream", methods=["POST"])
+def receive_message_stream():
+    data = request.get_json()
 
-    # Encourage fewer search calls
-    message += " If the request involves GitHub context, avoid calling github_search_code repeatedly (rate-limited). Prefer github_get_file for known files like README.md or key entrypoints."
-    message += " If you need GitHub context and the repository is not specified at the beginning of the message, ask the user to provide the repo in the form owner/repo before calling GitHub tools."
-    message += " Never output secrets (tokens, .env contents, private keys). If you detect secrets, do not print them."
+    if not data or "message" not in data:
+        return jsonify({"error": "Missing 'message' field"}), 400
 
-    message += " Don't give a long answer with explanations on what you did (like describing tasks created). Simply respond with the result like for example 'I created the project X and generated relevent tasks'. If no set of instructions apply, do not create or update a project or task. Instead, simply respond to the message as a helpful assistant would."
+    message = data["message"]
+    sessionId = str(data.get("sessionId") or request.headers.get("X-Session-Id") or "default")
 
-    response = await client.add_message(
-        thread_id=thread.thread_id,
-        memory="Auto",
-        content=message,
-        stream=False
-    )
+    # The run pushes events from the background loop, this request thread relays them as SSE
+    events = queue.Queue()
+    info = {}
+    future = asyncio.run_coroutine_threadsafe(sendMessage(message, sessionId, emit=events.put, stream=True, info=info), loop)
+    future.add_done_callback(lambda _: events.put(None))
 
-    while getattr(response, "status", None) == "REQUIRES_ACTION" and getattr(response, "tool_calls", None):
-        tool_outputs = []
-        print("Assistant requested tool calls.")
+    def generate():
+        with span(requestSeconds, route="/sendMessage/stream") as labels:
+            while True:
+                try:
+                    event = events.get(timeout=120)
+                except queue.Empty:
+                    future.cancel()
+                    labels["status"] = 504
+                    yield sse_event("error", {"error": "Timed out waiting for the assistant"})
+                    return
 
-        normalized_tool_calls = [_normalize_tool_call(tc) for tc in response.tool_calls]
+                if event is None:
+                    break
+                yield sse_event(event["type"], event)
 
-        for tc in normalized_tool_calls:
             try:
-                tool_name = tc.function.name
-
-                # --- NEW: hard cap github_search_code to 1 call per /sendMessage run ---
-                if tool_name == "github_search_code":
-                    github_search_calls += 1
-                    if github_search_calls > 1:
-                        result = {
-                            "tool_call_id": tc.id,
-                            "output": json.dumps({
-                                "error": "github_search_code call blocked to prevent rate limits. Use github_get_file for README.md or list files first."
-                            })
-                        }
-                        tool_outputs.append(result)
-                        continue
-                # ---------------------------------------------------------------------
-
-                match tool_name:
-                    case "create_project":
-                        print("Creating project...")
-                        result = create_project(tc)
-                    case "create_task":
-                        print("Creating task...")
-                        result = create_task(tc)
-                    case "update_project":
-                        print("Updating project...")
-                        result = update_project(tc)
-                    case "update_task":
-                        print("Updating task...")
-                        result = update_task(tc)
-                    case "github_search_code":
-                        print("Searching GitHub code...")
-                        result = github_search_code(tc)
-                    case "github_get_file":
-                        print("Fetching GitHub file...")
-                        result = github_get_file(tc)
-                    case _:
-                        result = {"tool_call_id": tc.id, "output": json.dumps({"error": f"Unknown tool {tool_name}"})}
-
+                response = future.result() or ""
             except Exception as e:
-                result = {"tool_call_id": tc.id, "output": json.dumps({"error": str(e)})}
-
-            tool_outputs.append(result)
+                labels["status"] = 500
+                yield sse_event("error", {"error": str(e)})
+                return
 
-            # --- NEW: tiny delay after each GitHub call to reduce burstiness ---
-            if tool_name in ("github_search_code", "github_get_file"):
-                await asyncio.sleep(0.2)
-            # ------------------------------------------------------------------
+            labels["status"] = 200
+            print("Response:", response)
+            yield sse_event("done", {"status": "ok", "message": response, "info": info})
 
-        print("Tool outputs:", tool_outputs)
+    return Response(generate(), mimetype="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
-        response = await client.submit_tool_outputs(
-            thread_id=thread.thread_id,
-            run_id=response.run_id,
-            tool_outputs=tool_outputs
-        )
 
-    return getattr(response, "content", None) or ""
+@app.route("/jobs/<job_id>", methods=["GET"])
+def get_job(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown or expired job"}), 404
 
+    # ?wait=N long-polls for up to N seconds instead of returning the current state right away
+    wait = min(request.args.get("wait", default=0, type=float), 60)
+    if wait > 0:
+        job.wait(wait)
 
-async def main():
-    global client
-    client = BackboardClient(api_key=BACKBOARD_API_KEY)
+    return jsonify(job.to_dict()), 200
 
-    global assistant
-    assistant = await client.create_assistant(
-        name="Project Assistant",
-        description="An assistant that can help with project management tasks.",
-        tools=[
-            create_project_tool,
-            create_task_tool,
-            update_project_tool,
-            update_task_tool,
-            github_search_code_tool,
-            github_get_file_tool
-        ]
-    )
 
-    global thread
-    thread = await client.create_thread(assistant.assistant_id)
+@app.route("/metrics", methods=["GET"])
+def get_metrics():
+    return Response(render(), mimetype=CONTENT_TYPE)
 
 
 if __name__ == "__main__":
-    asyncio.run_coroutine_threadsafe(main(), loop).result()
-    app.run(debug=False, port=8000)
+    parser = argparse.ArgumentParser(description="Project assistant backend")
+    parser.add_argument("--asgi", action="store_true", help="Serve with uvicorn and native async handlers instead of Flask")
+    parser.add_argument("--workers", type=int, default=1, help="Number of worker processes (ASGI mode only, must be 1 for now)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+    # Jobs, per-session locks and the thread map live in this process, other workers would not see them
+    if args.workers > 1:
+        parser.error("--workers > 1 is not supported: jobs and session locks are not shared between processes")
+
+    if args.asgi:
+        import uvicorn
+        uvicorn.run("asgi:app", host=args.host, port=args.port, workers=args.workers)
+    else:
+        asyncio.run_coroutine_threadsafe(main(), loop).result()
+        app.run(debug=False, host=args.host, port=args.port)
@@ -0,0 +1,153 @@
+import asyncio
+import contextlib
+import functools
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse, Response
+from starlette.routing import Route
+
+from config import CORS_ORIGINS
+from jobs import jobs
+from assistant import main, sendMessage, runJob, sse_event
+from metrics import requestSeconds, span, render, CONTENT_TYPE
+
+
+# Serve with: python -m server --asgi
+# Handlers run on uvicorn's event loop, the same one the Backboard client lives on,
+# so there is no hop through a background loop thread like in the Flask app.
+
+_background = set()
+
+
+async def _read_message(request: Request):
+    try:
+        data = await request.json()
+    except ValueError:
+        data = None
+
+    if not data or "message" not in data:
+        return None, None, JSONResponse({"error": "Missing 'message' field"}, status_code=400)
+
+    sessionId = str(data.get("sessionId") or request.headers.get("X-Session-Id") or "default")
+    return data, sessionId, None
+
+
+def timed(handler):
+    @functools.wraps(handler)
+    async def wrapper(request: Request):
+        with span(requestSeconds, route=request.url.path) as labels:
+            response = await handler(request)
+            labels["status"] = response.status_code
+        return response
+    return wrapper
+
+
+@timed
+async def receive_message(request: Request):
+    data, sessionId, error = await _read_message(request)
+    if error is not None:
+        return error
+
+    message = data["message"]
+
+    # Async mode: hand back a job id right away, the run continues on the loop
+    if data.get("async"):
+        job = jobs.create(sessionId)
+        if job is None:
+            return JSONResponse({"error": "Too many running jobs, try again later"}, status_code=503)
+
+        task = asyncio.create_task(runJob(job, message))
+        _background.add(task)
+        task.add_done_callback(_background.discard)
+        return JSONResponse({"status": "accepted", "jobId": job.id}, status_code=202)
+
+    info = {}
+    response = await asyncio.wait_for(sendMessage(message, sessionId, info=info), timeout=120)
+
+    if response is None:
+        response = ""
+
+    print("Response:", response)
+    return JSONResponse({"status": "ok", "message": response, "info": info})
+
+
+async def receive_message_stream(request: Request):
+    data, sessionId, error = await _read_message(request)
+    if error is not None:
+        return error
+
+    events = asyncio.Queue()
+    info = {}
+    run = asyncio.create_task(sendMessage(data["message"], sessionId, emit=events.put_nowait, stream=True, info=info))
+    run.add_done_callback(lambda _: events.put_nowait(None))
+
+    async def generate():
+        with span(requestSeconds, route="/sendMessage/stream") as labels:
+            while True:
+                try:
+                    event = await asyncio.wait_for(events.get(), timeout=120)
+                except asyncio.TimeoutError:
+                    run.cancel()
+                    labels["status"] = 504
+                    yield sse_event("error", {"error": "Timed out waiting for the assistant"})
+                    return
+
+                if event is None:
+                    break
+                yield sse_event(event["type"], event)
+
+            try:
+                response = run.result() or ""
+            except Exception as e:
+                labels["status"] = 500
+                yield sse_event("error", {"error": str(e)})
+                return
+
+            labels["status"] = 200
+            print("Response:", response)
+            yield sse_event("done", {"status": "ok", "message": response, "info": info})
+
+    return StreamingResponse(generate(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+async def get_job(request: Request):
+    job = jobs.get(request.path_params["job_id"])
+    if job is None:
+        return JSONResponse({"error": "Unknown or expired job"}, status_code=404)
+
+    # ?wait=N long-polls for up to N seconds instead of returning the current state right away
+    try:
+        wait = min(float(request.query_params.get("wait", 0)), 60)
+    except ValueError:
+        wait = 0
+    if wait > 0:
+        await asyncio.to_thread(job.wait, wait)
+
+    return JSONResponse(job.to_dict())
+
+
+async def get_metrics(request: Request):
+    return Response(render(), media_type=CONTENT_TYPE)
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    await main()
+    yield
+
+
+app = Starlette(
+    routes=[
+        Route("/sendMessage", receive_message, methods=["POST"]),
+        Route("/sendMessage/stream", receive_message_stream, methods=["POST"]),
+        Route("/jobs/{job_id}", get_job, methods=["GET"]),
+        Route("/metrics", get_metrics, methods=["GET"]),
+    ],
+    middleware=[
+        Middleware(CORSMiddleware, allow_origins=CORS_ORIGINS, allow_methods=["*"], allow_headers=["*"]),
+    ],
+    lifespan=lifespan,
+)
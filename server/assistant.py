@@ -0,0 +1,396 @@
+import asyncio
+import json
+import logging
+import time
+from backboard import BackboardClient
+
+from config import BACKBOARD_API_KEY, BACKBOARD_URL, GITHUB_TOOL_CONCURRENCY, INTENT_ROUTER, MIRROR_SYNC_INTERVAL
+from test import projectIdCache, workPackageIndex
+from openproject import openproject
+from mirror import mirror
+from metadata import metadata
+from transport import openprojectHttp, githubHttp
+from tool_executor import ToolExecutor
+from thread_manager import ThreadManager
+from jobs import jobs
+from github_cache import githubCache
+from github_ratelimit import githubScheduler
+from code_index import codeIndex
+from excerpt import OutputBudget, runBudget
+from prompts import SYSTEM_PROMPT, message_preamble
+from intent_router import route
+from registry import registry, fingerprint
+from tracing import recorder, currentTrace
+from metrics import llmSeconds, roundSeconds, roundsPerRun, routesTotal, runsInFlight, runsTotal, span
+from tools.create_project import create_project_tool, create_project
+from tools.create_task import create_task_tool, create_task
+from tools.create_tasks import create_tasks_tool, create_tasks
+from tools.update_project import update_project_tool, update_project
+from tools.update_task import update_task_tool, update_task
+from tools.reschedule_project import reschedule_project_tool, reschedule_project
+from tools.list_tasks import list_tasks_tool, list_tasks
+from tools.get_project_summary import get_project_summary_tool, get_project_summary
+
+# GitHub tools
+from tools.github_repo import (
+    github_search_code_tool,
+    github_get_file_tool,
+    github_get_files_tool,
+    github_search_code,
+    github_get_file,
+    github_get_files
+)
+
+logger = logging.getLogger(__name__)
+
+executor = ToolExecutor()
+executor.register("create_project", create_project, "Creating project...")
+executor.register("create_task", create_task, "Creating task...")
+executor.register("create_tasks", create_tasks, "Creating tasks...")
+executor.register("update_project", update_project, "Updating project...")
+executor.register("update_task", update_task, "Updating task...")
+executor.register("reschedule_project", reschedule_project, "Rescheduling project...")
+executor.register("list_tasks", list_tasks, "Listing tasks...")
+executor.register("get_project_summary", get_project_summary, "Summarizing project...")
+# GitHub pacing is handled by githubScheduler from the real rate-limit headers
+executor.register("github_search_code", github_search_code, "Searching GitHub code...", GITHUB_TOOL_CONCURRENCY)
+executor.register("github_get_file", github_get_file, "Fetching GitHub file...", GITHUB_TOOL_CONCURRENCY)
+executor.register("github_get_files", github_get_files, "Fetching GitHub files...", GITHUB_TOOL_CONCURRENCY)
+
+
+# --- helpers to support tool_calls as objects OR dicts ---
+class _FnShim:
+    def __init__(self, name, parsed_arguments):
+        self.name = name
+        self.parsed_arguments = parsed_arguments
+
+class _ToolCallShim:
+    def __init__(self, tc_dict):
+        self.id = tc_dict.get("id")
+        fn = tc_dict.get("function", {}) or {}
+        name = fn.get("name")
+
+        parsed = fn.get("parsed_arguments", None)
+        if parsed is None or parsed == {}:
+            args_raw = fn.get("arguments", None)
+            if isinstance(args_raw, str) and args_raw.strip():
+                try:
+                    parsed = json.loads(args_raw)
+                except Exception:
+                    parsed = {}
+            elif isinstance(args_raw, dict):
+                parsed = args_raw
+            else:
+                parsed = {}
+
+        self.function = _FnShim(name, parsed)
+
+def _normalize_tool_call(tc):
+    if hasattr(tc, "function") and hasattr(tc, "id"):
+        return tc
+    if isinstance(tc, dict):
+        return _ToolCallShim(tc)
+    raise TypeError(f"Unsupported tool call type: {type(tc)}")
+# --------------------------------------------------------
+
+
+# --- streaming helpers ---
+class _StreamedResponse:
+    """Collects a streamed Backboard run into the same shape as a non-streamed response."""
+
+    def __init__(self):
+        self.status = None
+        self.tool_calls = None
+        self.run_id = None
+        self.content = ""
+
+async def _consume_stream(events, emit) -> _StreamedResponse:
+    response = _StreamedResponse()
+
+    async for event in events:
+        event_type = event.get("type")
+
+        if event_type == "content_streaming":
+            token = event.get("content", "")
+            response.content += token
+            emit({"type": "token", "content": token})
+        elif event.get("content") and not response.content:
+            response.content = event["content"]
+
+        if event.get("run_id"):
+            response.run_id = event["run_id"]
+        if event.get("status"):
+            response.status = str(event["status"]).upper()
+        if event.get("tool_calls"):
+            response.tool_calls = event["tool_calls"]
+            response.status = "REQUIRES_ACTION"
+
+    return response
+
+def _describe_tool_result(tc, result) -> str:
+    try:
+        output = json.loads(result.get("output") or "{}")
+    except (TypeError, ValueError):
+        output = {}
+
+    if "error" in output:
+        return f"{tc.function.name} failed: {output['error']}"
+
+    match tc.function.name:
+        case "create_project":
+            return f"created project {output.get('name')}"
+        case "create_task":
+            return f"created task {output.get('subject')}"
+        case "create_tasks":
+            created = [t for t in output.get("tasks", []) if t.get("status_code") == 201]
+            return f"created {len(created)} of {len(output.get('tasks', []))} tasks"
+        case "update_project":
+            return f"updated project {output.get('name')}"
+        case "update_task":
+            return f"updated task {output.get('subject')}"
+        case "reschedule_project":
+            return f"moved {output.get('shifted')} tasks of {output.get('projectName')} by {output.get('days')} days"
+        case "list_tasks":
+            return f"listed {output.get('count')} tasks of {output.get('projectName')}"
+        case "get_project_summary":
+            return f"summarized project {output.get('projectName')}"
+        case "github_search_code":
+            return f"searched {output.get('repo')} for {output.get('query')}"
+        case "github_get_file":
+            return f"read {output.get('path')} from {output.get('repo')}"
+        case "github_get_files":
+            return f"read {output.get('count')} files from {output.get('repo')}"
+        case _:
+            return f"ran {tc.function.name}"
+# -------------------------
+
+
+def sse_event(event_type: str, data: dict) -> str:
+    return f"event: {event_type}\ndata: {json.dumps(data)}\n\n"
+
+
+async def runJob(job, message: str):
+    job.start()
+    try:
+        response = await sendMessage(message, job.sessionId, emit=job.record, info=job.info)
+        job.finish(message=response or "")
+    except Exception as e:
+        print("Job failed:", job.id, e)
+        job.finish(error=str(e))
+
+
+async def _routeLocally(message: str, emit=None, info: dict = None):
+    """Run the tool call the intent router matched, None to fall back to the LLM.
+
+    A call that didn't succeed (unknown project, conflict, ...) also falls back,
+    nothing was changed and the assistant can ask the user for details.
+    """
+    call = route(message)
+    if call is None:
+        return None
+
+    # Kept out of the trace until it succeeded, a fallback is recorded as a plain LLM run
+    trace = currentTrace.get()
+    token = currentTrace.set(None)
+    started = time.perf_counter()
+    try:
+        result = await executor.run(call)
+    finally:
+        currentTrace.reset(token)
+    try:
+        output = json.loads(result.get("output") or "{}")
+    except ValueError:
+        output = {}
+    if output.get("status_code") not in (200, 201):
+        print("Intent router fell back to the assistant:", call.function.name, output)
+        return None
+
+    if trace is not None:
+        trace.round([call])
+        trace.tool(call, result, time.perf_counter() - started)
+
+    description = _describe_tool_result(call, result)
+    if emit is not None:
+        emit({"type": "tool", "tool": call.function.name, "message": description})
+    return f"I {description}."
+
+
+async def sendMessage(message: str, sessionId: str = "default", emit=None, stream: bool = False, info: dict = None):
+    if message == "":
+        return ""
+
+    # Opt-in (TRACE_DIR): record the run for bench/replay.py
+    trace = recorder.start(message, sessionId)
+    currentTrace.set(trace)
+
+    # Simple edits ("rename project Foo to Bar") skip the LLM entirely
+    response = await _routeLocally(message, emit, info) if INTENT_ROUTER else None
+    if info is not None:
+        info["route"] = "llm" if response is None else "local"
+    routesTotal.inc(route="llm" if response is None else "local")
+    if response is not None:
+        if trace is not None:
+            trace.finish(content=response)
+            recorder.write(trace)
+        return response
+
+    # One Backboard thread per session, runs on different sessions don't wait on each other
+    async with threads.session(sessionId) as thread_id:
+        with runsInFlight.track():
+            try:
+                response = await runMessage(message, thread_id, emit, stream, info)
+            except Exception as e:
+                runsTotal.inc(status="error")
+                if trace is not None:
+                    trace.finish(error=str(e))
+                    recorder.write(trace)
+                raise
+        runsTotal.inc(status="ok")
+        if trace is not None:
+            trace.finish(content=response)
+            recorder.write(trace)
+        return response
+
+
+async def runMessage(message: str, thread_id: str, emit=None, stream: bool = False, info: dict = None):
+    # emit receives tool-progress events (and tokens when stream is set) as the run goes,
+    # info (when given) collects per-request numbers such as the prompt size
+    runBudget.set(OutputBudget())
+
+    message += message_preamble()
+
+    # Per-request prompt size, the static instructions live in the assistant's system prompt
+    if info is not None:
+        info["prompt_chars"] = len(message)
+    logger.debug("Prompt size: %d chars", len(message))
+
+    trace = currentTrace.get()
+
+    with span(llmSeconds, call="add_message"):
+        llmStart = time.perf_counter()
+        response = await client.add_message(
+            thread_id=thread_id,
+            memory="Auto",
+            content=message,
+            stream=stream
+        )
+        if stream:
+            response = await _consume_stream(response, emit)
+    if trace is not None:
+        trace.backboard(time.perf_counter() - llmStart)
+
+    rounds = 0
+    while getattr(response, "status", None) == "REQUIRES_ACTION" and getattr(response, "tool_calls", None):
+        print("Assistant requested tool calls.")
+        rounds += 1
+        roundStart = time.perf_counter()
+
+        normalized_tool_calls = [_normalize_tool_call(tc) for tc in response.tool_calls]
+        if trace is not None:
+            trace.round(normalized_tool_calls)
+
+        # Independent tool calls run concurrently, results keep the original order
+        def onResult(tc, result):
+            emit({"type": "tool", "tool": tc.function.name, "message": _describe_tool_result(tc, result)})
+
+        tool_outputs = await executor.run_all(normalized_tool_calls, onResult if emit is not None else None)
+
+        print("Tool outputs:", tool_outputs)
+
+        with span(llmSeconds, call="submit_tool_outputs"):
+            llmStart = time.perf_counter()
+            response = await client.submit_tool_outputs(
+                thread_id=thread_id,
+                run_id=response.run_id,
+                tool_outputs=tool_outputs,
+                stream=stream
+            )
+            if stream:
+                response = await _consume_stream(response, emit)
+        if trace is not None:
+            trace.backboard(time.perf_counter() - llmStart)
+        roundSeconds.observe(time.perf_counter() - roundStart)
+
+    roundsPerRun.observe(rounds)
+    if info is not None:
+        info["rounds"] = rounds
+
+    # Component state for local debugging, gathered only when DEBUG logging is on
+    if logger.isEnabledFor(logging.DEBUG):
+        budget = runBudget.get()
+        logger.debug("Stats: %s", {
+            "project_id_cache": projectIdCache.stats(),
+            "work_package_index": workPackageIndex.stats(),
+            "mirror": mirror.stats(),
+            "metadata": metadata.stats(),
+            "http": {"openproject": openprojectHttp.stats(), "github": githubHttp.stats()},
+            "threads": threads.stats(),
+            "registry": registry.stats(),
+            "traces": recorder.stats(),
+            "jobs": jobs.stats(),
+            "github_cache": githubCache.stats(),
+            "github_rate_limits": githubScheduler.stats(),
+            "code_index": codeIndex.stats(),
+            "github_output_budget_used": budget.total - budget.remaining,
+        })
+
+    usage = getattr(response, "context_usage", None)
+    if info is not None and usage is not None:
+        info["context_usage"] = usage.model_dump() if hasattr(usage, "model_dump") else dict(usage)
+    logger.debug("Context usage: %s", usage)
+
+    return getattr(response, "content", None) or ""
+
+
+async def main():
+    global client
+    client = BackboardClient(api_key=BACKBOARD_API_KEY, base_url=BACKBOARD_URL)
+
+    global assistantId
+    definition = {
+        "name": "Project Assistant",
+        "description": "An assistant that can help with project management tasks.",
+        "system_prompt": SYSTEM_PROMPT,
+        "tools": [
+            create_project_tool,
+            create_task_tool,
+            create_tasks_tool,
+            update_project_tool,
+            update_task_tool,
+            reschedule_project_tool,
+            list_tasks_tool,
+            get_project_summary_tool,
+            github_search_code_tool,
+            github_get_file_tool,
+            github_get_files_tool
+        ]
+    }
+
+    # Reuse the assistant from a previous start while its definition is unchanged
+    key = fingerprint(definition)
+    async with registry.alocked():
+        assistantId = await asyncio.to_thread(registry.assistant, key)
+        if assistantId is None:
+            assistantId = str((await client.create_assistant(**definition)).assistant_id)
+            await asyncio.to_thread(registry.set_assistant, key, assistantId)
+            print("Created assistant:", assistantId)
+        else:
+            print("Reusing assistant:", assistantId)
+
+    global threads
+    threads = ThreadManager(client, assistantId, registry=registry)
+
+    # Real priority/status ids before the first request, the stock defaults if OpenProject can't be reached
+    try:
+        await metadata.load(openproject)
+        print("Loaded OpenProject metadata:", metadata.stats())
+    except Exception as e:
+        print("Loading OpenProject metadata failed, using defaults:", e)
+    global metadataRefresh
+    metadataRefresh = asyncio.create_task(metadata.run(openproject))
+
+    # Keep the local OpenProject mirror in sync on this loop for as long as the server runs
+    global mirrorSync
+    if MIRROR_SYNC_INTERVAL > 0:
+        mirrorSync = asyncio.create_task(mirror.run(openproject))
+
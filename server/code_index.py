@@ -0,0 +1,259 @@
+import io
+import math
+import re
+import tarfile
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from config import CODE_INDEX_MAX_REPOS, CODE_INDEX_MAX_FILE_BYTES, CODE_INDEX_MAX_TARBALL_BYTES
+from github_api import GITHUB_API_BASE, github_headers, scheduled_get, resolve_sha
+
+
+WORD_RE = re.compile(r"[A-Za-z0-9_]+")
+CAMEL_RE = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+")
+
+# Above this many changed files a fresh tarball is cheaper than per-file fetches
+MAX_INCREMENTAL_FILES = 50
+
+
+def tokenize(text: str) -> list[str]:
+    """Split into lowercase tokens, keeping whole identifiers and their camelCase/snake_case parts.
+
+    "getProjectId" -> ["getprojectid", "get", "project", "id"]
+    """
+    tokens = []
+    for word in WORD_RE.findall(text):
+        lower = word.lower()
+        tokens.append(lower)
+        parts = [p.lower() for chunk in word.split("_") for p in CAMEL_RE.findall(chunk)]
+        if len(parts) > 1:
+            tokens.extend(parts)
+    return tokens
+
+
+class RepoSnapshot:
+    """All text files of a repository at one commit, with an inverted index over paths and contents."""
+
+    def __init__(self, repo: str, sha: str, files: dict[str, str]):
+        self.repo = repo
+        self.sha = sha
+        self.files = {}
+        self._postings = {}
+        self._pathTokens = {}
+        for path, text in files.items():
+            self._add(path, text)
+
+    def _add(self, path: str, text: str):
+        self.files[path] = text
+        self._pathTokens[path] = set(tokenize(path))
+        for token, count in Counter(tokenize(text)).items():
+            self._postings.setdefault(token, {})[path] = count
+
+    def _remove(self, path: str):
+        text = self.files.pop(path, None)
+        self._pathTokens.pop(path, None)
+        if text is None:
+            return
+        for token in set(tokenize(text)):
+            postings = self._postings.get(token)
+            if postings is not None:
+                postings.pop(path, None)
+                if not postings:
+                    del self._postings[token]
+
+    def apply(self, sha: str, changed: dict[str, str], removed: list[str]):
+        for path in removed:
+            self._remove(path)
+        for path, text in changed.items():
+            self._remove(path)
+            self._add(path, text)
+        self.sha = sha
+
+    def search(self, query: str, limit: int = 5) -> list[dict]:
+        queryTokens = set(tokenize(query))
+        if not queryTokens:
+            return []
+
+        total = max(len(self.files), 1)
+        scores = Counter()
+        for token in queryTokens:
+            postings = self._postings.get(token, {})
+            idf = math.log(1 + total / (1 + len(postings)))
+            for path, count in postings.items():
+                scores[path] += idf * (1 + math.log(count))
+
+        # Path matches count for more than content matches, the verbatim query for more still
+        phrase = query.lower()
+        for path, tokens in self._pathTokens.items():
+            overlap = len(queryTokens & tokens)
+            if overlap:
+                scores[path] += 3 * overlap
+        for path in list(scores):
+            if phrase in self.files[path].lower():
+                scores[path] += 5
+
+        results = []
+        for path, score in scores.most_common(limit):
+            results.append({
+                "path": path,
+                "name": path.rsplit("/", 1)[-1],
+                "html_url": f"https://github.com/{self.repo}/blob/{self.sha}/{path}",
+                "repository": self.repo,
+                "score": round(score, 2),
+                "match": self._firstMatch(path, queryTokens),
+            })
+        return results
+
+    def _firstMatch(self, path: str, queryTokens: set[str]):
+        for number, line in enumerate(self.files[path].splitlines(), 1):
+            if queryTokens & set(tokenize(line)):
+                return {"line": number, "text": line.strip()[:200]}
+        return None
+
+
+def _decode(data: bytes):
+    if len(data) > CODE_INDEX_MAX_FILE_BYTES or b"\0" in data[:8192]:
+        return None
+    return data.decode("utf-8", errors="replace")
+
+
+class CodeIndex:
+    """Keeps RepoSnapshots of the last few repositories searched.
+
+    A snapshot is built once per commit from the repository tarball. When the
+    default branch moves, the compare API tells us which files changed and only
+    those are refetched.
+    """
+
+    def __init__(self, maxRepos: int = CODE_INDEX_MAX_REPOS):
+        self.maxRepos = maxRepos
+        self.counters = {"builds": 0, "incremental": 0, "searches": 0}
+        self._snapshots = OrderedDict()
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def _repoLock(self, repo: str) -> threading.RLock:
+        with self._lock:
+            return self._locks.setdefault(repo, threading.RLock())
+
+    def cached(self, repo: str, sha: str):
+        """Snapshot of repo at sha if one is already in memory, never downloads."""
+        with self._lock:
+            snapshot = self._snapshots.get(repo)
+            return snapshot if snapshot is not None and snapshot.sha == sha else None
+
+    def snapshot(self, repo: str, ref: str = "HEAD"):
+        sha = resolve_sha(repo, ref)
+        if sha is None:
+            return None
+
+        with self._repoLock(repo):
+            with self._lock:
+                current = self._snapshots.get(repo)
+            if current is not None and current.sha == sha:
+                self._touch(repo)
+                return current
+
+            if current is not None and self._update(current, sha):
+                self.counters["incremental"] += 1
+            else:
+                current = self._build(repo, sha)
+                if current is None:
+                    return None
+                self.counters["builds"] += 1
+
+            with self._lock:
+                self._snapshots[repo] = current
+            self._touch(repo)
+            return current
+
+    def search(self, repo: str, query: str, limit: int = 5):
+        # Held while searching so an incremental update can't patch the snapshot underneath us
+        with self._repoLock(repo):
+            snapshot = self.snapshot(repo)
+            if snapshot is None:
+                return None
+            self.counters["searches"] += 1
+            return snapshot.search(query, limit)
+
+    def _touch(self, repo: str):
+        with self._lock:
+            self._snapshots.move_to_end(repo)
+            while len(self._snapshots) > self.maxRepos:
+                self._snapshots.popitem(last=False)
+
+    def _build(self, repo: str, sha: str):
+        started = time.monotonic()
+        r = scheduled_get(f"{GITHUB_API_BASE}/repos/{repo}/tarball/{sha}", headers=github_headers(), timeout=60, stream=True)
+        try:
+            if r.status_code != 200:
+                print("Error downloading tarball:", repo, r.status_code)
+                return None
+
+            data = io.BytesIO()
+            for chunk in r.iter_bytes(chunk_size=1024 * 1024):
+                data.write(chunk)
+                if data.tell() > CODE_INDEX_MAX_TARBALL_BYTES:
+                    print("Tarball too large to index:", repo)
+                    return None
+            data.seek(0)
+        finally:
+            # Streamed: hands the connection back to the pool
+            r.close()
+
+        files = {}
+        with tarfile.open(fileobj=data, mode="r:gz") as tar:
+            for member in tar:
+                if not member.isfile() or member.size > CODE_INDEX_MAX_FILE_BYTES:
+                    continue
+                # Entries live under a "<owner>-<repo>-<sha>/" top-level directory
+                path = member.name.split("/", 1)[-1]
+                text = _decode(tar.extractfile(member).read())
+                if text is not None:
+                    files[path] = text
+
+        snapshot = RepoSnapshot(repo, sha, files)
+        print(f"Indexed {repo}@{sha[:7]}: {len(files)} files in {time.monotonic() - started:.1f}s")
+        return snapshot
+
+    def _update(self, snapshot: RepoSnapshot, sha: str) -> bool:
+        r = scheduled_get(f"{GITHUB_API_BASE}/repos/{snapshot.repo}/compare/{snapshot.sha}...{sha}", headers=github_headers())
+        if r.status_code != 200:
+            return False
+
+        compare = r.json()
+        changes = compare.get("files", [])
+        # Diverged histories (force pushes) or big changes get a fresh tarball instead
+        if compare.get("status") not in ("ahead", "identical") or len(changes) > MAX_INCREMENTAL_FILES:
+            return False
+
+        changed, removed = {}, []
+        for change in changes:
+            if change.get("previous_filename"):
+                removed.append(change["previous_filename"])
+            if change.get("status") == "removed":
+                removed.append(change["filename"])
+                continue
+
+            headers = github_headers()
+            headers["Accept"] = "application/vnd.github.raw"
+            fr = scheduled_get(f"{GITHUB_API_BASE}/repos/{snapshot.repo}/contents/{change['filename']}", headers=headers, params={"ref": sha})
+            if fr.status_code != 200:
+                return False
+            text = _decode(fr.content)
+            if text is None:
+                removed.append(change["filename"])
+            else:
+                changed[change["filename"]] = text
+
+        snapshot.apply(sha, changed, removed)
+        print(f"Updated index of {snapshot.repo} to {sha[:7]}: {len(changed)} changed, {len(removed)} removed")
+        return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self.counters, "repos": len(self._snapshots)}
+
+
+codeIndex = CodeIndex()
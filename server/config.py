@@ -7,4 +7,92 @@ BACKBOARD_API_KEY = os.getenv("BACKBOARD_API_KEY")
 
 OPENPROJECT_API_KEY = os.getenv("OPENPROJECT_API_KEY")
 
-GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
\ No newline at end of file
+GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
+
+# Upstream base URLs (overridable to point the server at local stand-ins, see bench/)
+OPENPROJECT_URL = os.getenv("OPENPROJECT_URL", "https://openproject.chiem.me")
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com")
+BACKBOARD_URL = os.getenv("BACKBOARD_URL", "https://app.backboard.io/api")
+
+# How long (in seconds) a resolved project name -> ID mapping stays valid
+PROJECT_CACHE_TTL = float(os.getenv("PROJECT_CACHE_TTL", "300"))
+
+# How often (seconds) the instance's priorities, statuses, types and form schema are reloaded
+METADATA_REFRESH_INTERVAL = float(os.getenv("METADATA_REFRESH_INTERVAL", "3600"))
+
+# Fuzzy name matching: score (0-1) above which the best project/task match is used without asking,
+# provided it beats the runner-up by at least the margin
+NAME_MATCH_THRESHOLD = float(os.getenv("NAME_MATCH_THRESHOLD", "0.85"))
+NAME_MATCH_MARGIN = float(os.getenv("NAME_MATCH_MARGIN", "0.1"))
+
+# Maximum number of work package POSTs in flight for one create_tasks call
+CREATE_TASKS_CONCURRENCY = int(os.getenv("CREATE_TASKS_CONCURRENCY", "5"))
+
+# Maximum number of work package PATCHes in flight for one reschedule_project call
+RESCHEDULE_CONCURRENCY = int(os.getenv("RESCHEDULE_CONCURRENCY", "8"))
+
+# Tool execution: worker threads for blocking tools and per-tool concurrency limits
+TOOL_WORKERS = int(os.getenv("TOOL_WORKERS", "16"))
+TOOL_CONCURRENCY = int(os.getenv("TOOL_CONCURRENCY", "4"))
+GITHUB_TOOL_CONCURRENCY = int(os.getenv("GITHUB_TOOL_CONCURRENCY", "2"))
+
+# OpenProject HTTP client (sync and async): timeouts (seconds), connection pool size and retries on 5xx/429
+OPENPROJECT_CONNECT_TIMEOUT = float(os.getenv("OPENPROJECT_CONNECT_TIMEOUT", "5"))
+OPENPROJECT_READ_TIMEOUT = float(os.getenv("OPENPROJECT_READ_TIMEOUT", "30"))
+OPENPROJECT_MAX_CONNECTIONS = int(os.getenv("OPENPROJECT_MAX_CONNECTIONS", "20"))
+OPENPROJECT_RETRIES = int(os.getenv("OPENPROJECT_RETRIES", "3"))
+
+# GitHub HTTP client: timeouts (seconds), connection pool size and retries on 5xx/connection errors
+GITHUB_CONNECT_TIMEOUT = float(os.getenv("GITHUB_CONNECT_TIMEOUT", "5"))
+GITHUB_READ_TIMEOUT = float(os.getenv("GITHUB_READ_TIMEOUT", "20"))
+GITHUB_MAX_CONNECTIONS = int(os.getenv("GITHUB_MAX_CONNECTIONS", "10"))
+GITHUB_RETRIES = int(os.getenv("GITHUB_RETRIES", "2"))
+
+# Shared HTTP transport: HTTP/2 when the h2 package is installed (1 enables), and the per-upstream
+# circuit breaker (consecutive failures that open it, seconds before a trial request is let through)
+HTTP2 = os.getenv("HTTP2", "0") == "1"
+CIRCUIT_FAILURES = int(os.getenv("CIRCUIT_FAILURES", "5"))
+CIRCUIT_COOLDOWN = float(os.getenv("CIRCUIT_COOLDOWN", "30"))
+
+# Maximum number of per-session Backboard threads kept live (least recently used are dropped)
+MAX_THREADS = int(os.getenv("MAX_THREADS", "256"))
+
+# Local registry of the Backboard assistant and per-session thread ids, reused across restarts
+REGISTRY_PATH = os.getenv("REGISTRY_PATH", ".cache/registry.json")
+
+# Handle simple edits ("rename project Foo to Bar") with the local intent router instead of the LLM (0 disables)
+INTENT_ROUTER = os.getenv("INTENT_ROUTER", "1") != "0"
+
+# Opt-in run traces for replay (bench/replay.py): directory to write them to, empty disables recording,
+# and how many characters of each tool output / final answer are kept
+TRACE_DIR = os.getenv("TRACE_DIR", "")
+TRACE_OUTPUT_CHARS = int(os.getenv("TRACE_OUTPUT_CHARS", "2000"))
+
+# Async job mode: how many jobs are remembered and how long finished ones are kept (seconds)
+MAX_JOBS = int(os.getenv("MAX_JOBS", "1000"))
+JOB_TTL = float(os.getenv("JOB_TTL", "3600"))
+
+# Origins allowed to call the API (the OpenProject instance the extension runs on)
+CORS_ORIGINS = ["https://openproject.chiem.me"]
+
+# GitHub response cache: on-disk location and size limits (bytes) for disk and memory
+GITHUB_CACHE_DIR = os.getenv("GITHUB_CACHE_DIR", ".cache/github")
+GITHUB_CACHE_MAX_BYTES = int(os.getenv("GITHUB_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+GITHUB_CACHE_MEMORY_BYTES = int(os.getenv("GITHUB_CACHE_MEMORY_BYTES", str(32 * 1024 * 1024)))
+
+# Longest a GitHub call may be held back (seconds) before the model is told to retry later
+GITHUB_MAX_WAIT = float(os.getenv("GITHUB_MAX_WAIT", "5"))
+
+# Local code index for github_search_code: repos kept in memory and size limits (bytes)
+CODE_INDEX_MAX_REPOS = int(os.getenv("CODE_INDEX_MAX_REPOS", "8"))
+CODE_INDEX_MAX_FILE_BYTES = int(os.getenv("CODE_INDEX_MAX_FILE_BYTES", str(512 * 1024)))
+CODE_INDEX_MAX_TARBALL_BYTES = int(os.getenv("CODE_INDEX_MAX_TARBALL_BYTES", str(100 * 1024 * 1024)))
+
+# Total characters of file content the GitHub tools may return during one run
+GITHUB_OUTPUT_BUDGET = int(os.getenv("GITHUB_OUTPUT_BUDGET", "40000"))
+
+# Local mirror of OpenProject projects and work packages: seconds between incremental syncs (0 disables
+# the background sync, the mirror is then loaded on first use), seconds between full resyncs and page size
+MIRROR_SYNC_INTERVAL = float(os.getenv("MIRROR_SYNC_INTERVAL", "60"))
+MIRROR_FULL_SYNC_INTERVAL = float(os.getenv("MIRROR_FULL_SYNC_INTERVAL", "3600"))
+MIRROR_PAGE_SIZE = int(os.getenv("MIRROR_PAGE_SIZE", "200"))
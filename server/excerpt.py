@@ -0,0 +1,151 @@
+import contextvars
+import re
+import threading
+
+from config import GITHUB_OUTPUT_BUDGET
+from code_index import tokenize
+
+
+# Lines that start a new section: markdown headings and top-level definitions in common languages
+SECTION_RE = re.compile(
+    r"^(#{1,6}\s+\S"
+    r"|(async\s+)?def\s+\w+|class\s+\w+"
+    r"|(export\s+)?(default\s+)?(async\s+)?function\b|(export\s+)?(abstract\s+)?class\s+\w+"
+    r"|(export\s+)?(const|let|var)\s+\w+\s*=\s*(async\s*)?(\(|function)"
+    r"|(export\s+)?(interface|type|enum)\s+\w+"
+    r"|func\s+|(pub\s+)?(fn|struct|enum|trait|impl)\b"
+    r"|(public|private|protected)?\s*(static\s+)?(class|interface)\s+\w+)"
+)
+
+MAX_OUTLINE_ENTRIES = 80
+
+
+class OutputBudget:
+    """Characters of file content the GitHub tools may still return in this run."""
+
+    def __init__(self, total: int = GITHUB_OUTPUT_BUDGET):
+        self.total = total
+        self.remaining = total
+        self._lock = threading.Lock()
+
+    def take(self, wanted: int) -> int:
+        with self._lock:
+            granted = max(min(wanted, self.remaining), 0)
+            self.remaining -= granted
+            return granted
+
+    def refund(self, unused: int):
+        with self._lock:
+            self.remaining += max(unused, 0)
+
+
+# Set once per run in runMessage(), the tool executor carries it into worker threads
+runBudget = contextvars.ContextVar("runBudget", default=None)
+
+
+def current_budget() -> OutputBudget:
+    budget = runBudget.get()
+    return budget if budget is not None else OutputBudget()
+
+
+def outline(text: str) -> list[dict]:
+    """Section starts of a file: [{"line": 12, "title": "def getProjectId(name: str) -> int:"}, ...]"""
+    entries = []
+    inFence = False
+    for number, line in enumerate(text.splitlines(), 1):
+        if line.startswith("```"):
+            inFence = not inFence
+            continue
+        if not inFence and SECTION_RE.match(line):
+            entries.append({"line": number, "title": line.strip()[:120]})
+    return entries
+
+
+def _outline_cost(entries: list[dict]) -> int:
+    # Rough serialized size of the outline entries
+    return sum(len(e["title"]) + 24 for e in entries)
+
+
+def _fit_outline(entries: list[dict], max_chars: int) -> list[dict]:
+    fitted, cost = [], 0
+    for entry in entries[:MAX_OUTLINE_ENTRIES]:
+        cost += _outline_cost([entry])
+        if cost > max_chars:
+            break
+        fitted.append(entry)
+    return fitted
+
+
+def _sections(text: str, starts: list[int]) -> list[tuple[int, int, str]]:
+    lines = text.splitlines()
+    bounds = [1] + [s for s in starts if s > 1] + [len(lines) + 1]
+    return [
+        (start, end - 1, "\n".join(lines[start - 1:end - 1]))
+        for start, end in zip(bounds, bounds[1:])
+        if end > start
+    ]
+
+
+def excerpt(text: str, query: str, max_chars: int) -> dict:
+    """Outline of the file plus the sections that best match query, within max_chars together.
+
+    Sections are ranked by how many query tokens they contain (titles count
+    double). Without a query, or for ties, earlier sections win, so the file
+    head is still what you get by default.
+    """
+    entries = outline(text)
+    # The outline gets at most half of max_chars, the rest is left for the matching sections
+    outlineEntries = _fit_outline(entries, max_chars // 2)
+    queryTokens = set(tokenize(query or ""))
+
+    ranked = []
+    for index, (start, end, body) in enumerate(_sections(text, [e["line"] for e in entries])):
+        tokens = tokenize(body)
+        title = set(tokenize(body.split("\n", 1)[0]))
+        score = sum(1 for t in tokens if t in queryTokens) + 2 * len(title & queryTokens)
+        ranked.append((-score, index, start, end, body))
+    ranked.sort()
+
+    budget = max_chars - _outline_cost(outlineEntries)
+    picked = []
+    for _, _, start, end, body in ranked:
+        if budget <= 0:
+            break
+        chunk = body if len(body) <= budget else body[:budget]
+        picked.append({"lines": f"{start}-{end}", "text": chunk})
+        budget -= len(chunk)
+
+    # Back in file order so the excerpt reads top to bottom
+    picked.sort(key=lambda s: int(s["lines"].split("-")[0]))
+
+    return {
+        "mode": "excerpt",
+        "total_chars": len(text),
+        "outline": outlineEntries,
+        "sections": picked,
+        "returned_chars": sum(len(s["text"]) for s in picked),
+    }
+
+
+def shape_content(text: str, max_chars: int, query: str = None) -> dict:
+    """Fit file content into max_chars and the run's output budget.
+
+    Small files come back whole. Larger ones (or any file once the run's budget
+    is getting tight) come back as an outline plus the most relevant sections.
+    """
+    budget = current_budget()
+    allowed = budget.take(max_chars)
+    if allowed <= 0:
+        return {
+            "mode": "omitted",
+            "total_chars": len(text),
+            "note": "Output budget for this run is used up. Answer with what you already have.",
+        }
+
+    if len(text) <= allowed:
+        budget.refund(allowed - len(text))
+        return {"mode": "full", "returned_chars": len(text), "content": text}
+
+    data = excerpt(text, query, allowed)
+    budget.refund(allowed - data["returned_chars"] - _outline_cost(data["outline"]))
+    return data
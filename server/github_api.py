@@ -0,0 +1,107 @@
+from config import GITHUB_TOKEN, GITHUB_API_URL
+from github_cache import githubCache
+from github_ratelimit import githubScheduler
+from transport import githubHttp
+import httpx
+import re
+
+
+GITHUB_API_BASE = GITHUB_API_URL.rstrip("/")
+GITHUB_GRAPHQL_URL = f"{GITHUB_API_BASE}/graphql"
+
+
+def github_headers():
+    h = {
+        "Accept": "application/vnd.github+json",
+        "User-Agent": "backboard-openproject-assistant",
+    }
+    if GITHUB_TOKEN:
+        h["Authorization"] = f"token {GITHUB_TOKEN}"
+    return h
+
+
+SHA_RE = re.compile(r"^[0-9a-f]{40}$")
+
+
+def _timed_request(method: str, url: str, **kwargs) -> httpx.Response:
+    # Pooled keep-alive connections, timing, retries on 5xx and the circuit breaker live in the transport
+    return githubHttp.request(method, url, **kwargs)
+
+
+def _paced_request(resource: str, method: str, url: str, **kwargs) -> httpx.Response:
+    githubScheduler.acquire(resource)
+    try:
+        r = _timed_request(method, url, **kwargs)
+    except Exception:
+        # Transport error or open circuit: GitHub never saw the request
+        githubScheduler.release(resource)
+        raise
+    githubScheduler.update(resource, r.status_code, r.headers)
+    return r
+
+
+def scheduled_request(method: str, url: str, headers: dict = None, timeout: float = None, **kwargs) -> httpx.Response:
+    """Request paced by githubScheduler (may raise RateLimited).
+
+    timeout overrides the transport's connect/read timeouts for this request only.
+    """
+    resource = githubScheduler.resource_for(url)
+    if timeout is not None:
+        kwargs["timeout"] = timeout
+    r = _paced_request(resource, method, url, headers=headers, **kwargs)
+
+    # Hit a limit anyway (e.g. a secondary limit): wait it out once if it is short,
+    # otherwise acquire() raises RateLimited for the tool to report
+    if r.status_code in (403, 429) and (r.headers.get("Retry-After") or r.headers.get("X-RateLimit-Remaining") == "0"):
+        r = _paced_request(resource, method, url, headers=headers, **kwargs)
+
+    return r
+
+
+def scheduled_get(url: str, headers: dict = None, params: dict = None, timeout: float = None, **kwargs) -> httpx.Response:
+    return scheduled_request("GET", url, headers=headers, params=params, timeout=timeout, **kwargs)
+
+
+def cached_get(key: tuple, url: str, params: dict = None, headers: dict = None, immutable: bool = False) -> tuple[int, str]:
+    """GET through the GitHub cache.
+
+    Immutable entries (keyed by commit SHA) are served without a request at
+    all, everything else is revalidated with If-None-Match, and 304 responses
+    don't count against the rate limit.
+    """
+    entry = githubCache.get(key)
+    if entry is not None and immutable:
+        githubCache.record("hits")
+        return 200, entry["body"]
+
+    h = github_headers()
+    h.update(headers or {})
+    if entry is not None and entry.get("etag"):
+        h["If-None-Match"] = entry["etag"]
+
+    r = scheduled_get(url, headers=h, params=params)
+
+    if r.status_code == 304 and entry is not None:
+        githubCache.record("revalidated")
+        return 200, entry["body"]
+
+    githubCache.record("misses")
+    if r.status_code == 200:
+        githubCache.put(key, r.headers.get("ETag"), r.text)
+
+    return r.status_code, r.text
+
+
+def resolve_sha(repo: str, ref: str):
+    """Resolve a branch or tag to its commit SHA (None if GitHub can't)."""
+    if SHA_RE.match(ref):
+        return ref
+
+    status_code, body = cached_get(
+        ("ref", repo, ref),
+        f"{GITHUB_API_BASE}/repos/{repo}/commits/{ref}",
+        headers={"Accept": "application/vnd.github.sha"}
+    )
+    if status_code != 200 or not SHA_RE.match(body.strip()):
+        return None
+    return body.strip()
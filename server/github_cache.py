@@ -0,0 +1,123 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from config import GITHUB_CACHE_DIR, GITHUB_CACHE_MAX_BYTES, GITHUB_CACHE_MEMORY_BYTES
+
+
+class GitHubCache:
+    """Two-level (memory LRU + disk) cache of GitHub response bodies and their ETags.
+
+    Entries are keyed by tuples such as ("contents", repo, sha, path). Both
+    levels are bounded by total body size, evicting least recently used
+    entries first (on disk, oldest modification time).
+    """
+
+    def __init__(self, directory: str = GITHUB_CACHE_DIR, maxBytes: int = GITHUB_CACHE_MAX_BYTES, memoryBytes: int = GITHUB_CACHE_MEMORY_BYTES):
+        self.directory = directory
+        self.maxBytes = maxBytes
+        self.memoryBytes = memoryBytes
+        self.counters = {"hits": 0, "revalidated": 0, "misses": 0, "evictions": 0}
+        self._memory = OrderedDict()
+        self._memorySize = 0
+        self._diskSize = None
+        self._lock = threading.Lock()
+
+    def _path(self, key: tuple) -> str:
+        digest = hashlib.sha256("\0".join(map(str, key)).encode()).hexdigest()
+        return os.path.join(self.directory, digest[:2], digest + ".json")
+
+    def get(self, key: tuple):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                return entry
+
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+            # Disk eviction goes by mtime, so a read counts as a use
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+
+        with self._lock:
+            self._remember(key, entry)
+        return entry
+
+    def put(self, key: tuple, etag: str, body: str):
+        entry = {"etag": etag, "body": body}
+        with self._lock:
+            self._remember(key, entry)
+
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp, path)
+        except OSError as e:
+            print("GitHub cache write failed:", e)
+            return
+
+        with self._lock:
+            if self._diskSize is not None:
+                self._diskSize += len(body)
+        self._evictDisk()
+
+    def record(self, counter: str):
+        with self._lock:
+            self.counters[counter] += 1
+
+    def _remember(self, key: tuple, entry: dict):
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memorySize -= len(previous["body"])
+        self._memory[key] = entry
+        self._memorySize += len(entry["body"])
+
+        while self._memorySize > self.memoryBytes and len(self._memory) > 1:
+            _, evicted = self._memory.popitem(last=False)
+            self._memorySize -= len(evicted["body"])
+
+    def _evictDisk(self):
+        with self._lock:
+            if self._diskSize is not None and self._diskSize <= self.maxBytes:
+                return
+
+        files = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if name.endswith(".json"):
+                    path = os.path.join(root, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    files.append((st.st_mtime, st.st_size, path))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.maxBytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            self.record("evictions")
+
+        with self._lock:
+            self._diskSize = total
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self.counters, "memory_bytes": self._memorySize, "memory_entries": len(self._memory)}
+
+
+githubCache = GitHubCache()
@@ -0,0 +1,126 @@
+import threading
+import time
+
+from config import GITHUB_MAX_WAIT
+
+
+class RateLimited(Exception):
+    def __init__(self, resource: str, retryAfter: float):
+        super().__init__(f"GitHub {resource} rate limit exhausted, retry after {retryAfter:.0f}s")
+        self.resource = resource
+        self.retryAfter = retryAfter
+
+    def to_dict(self) -> dict:
+        return {
+            "error": "rate_limited",
+            "resource": self.resource,
+            "retry_after": round(self.retryAfter),
+            "details": str(self),
+        }
+
+
+class _Bucket:
+    def __init__(self, limit: int, lowWater: int):
+        self.limit = limit
+        self.remaining = limit
+        self.reset = 0.0
+        self.lowWater = lowWater
+        self.blockedUntil = 0.0
+        self.lastCall = 0.0
+
+
+class GitHubScheduler:
+    """Shares GitHub's real request budget between every tool call.
+
+    Each API resource (core, search, graphql) is a bucket holding the remaining
+    requests until its reset time, kept in sync from the X-RateLimit-* and
+    Retry-After response headers. Calls pass straight through while the
+    budget is healthy. Once it drops below the low-water mark they are spaced
+    out until the reset, and a call that would have to wait longer than
+    maxWait raises RateLimited instead.
+    """
+
+    def __init__(self, maxWait: float = GITHUB_MAX_WAIT):
+        self.maxWait = maxWait
+        # Defaults are GitHub's authenticated limits until the first response says otherwise
+        self._buckets = {
+            "core": _Bucket(limit=5000, lowWater=50),
+            "search": _Bucket(limit=30, lowWater=3),
+            "graphql": _Bucket(limit=5000, lowWater=50),
+        }
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def resource_for(url: str) -> str:
+        if "/search/" in url:
+            return "search"
+        if url.endswith("/graphql"):
+            return "graphql"
+        return "core"
+
+    def _delay(self, bucket: _Bucket, now: float) -> float:
+        # Past the reset, or no reset time known at all (no rate-limit headers seen yet, e.g.
+        # every call so far failed): nothing says the budget is spent, start from a full one
+        if (bucket.remaining <= 0 and not bucket.reset) or (bucket.reset and now >= bucket.reset):
+            bucket.remaining = bucket.limit
+            bucket.reset = 0.0
+
+        if bucket.blockedUntil > now:
+            return bucket.blockedUntil - now
+        if bucket.remaining <= 0:
+            return bucket.reset - now
+        if bucket.remaining <= bucket.lowWater and bucket.reset > now:
+            # Spread what is left evenly over the rest of the window
+            spacing = (bucket.reset - now) / bucket.remaining
+            return max(bucket.lastCall + spacing - now, 0.0)
+        return 0.0
+
+    def acquire(self, resource: str):
+        bucket = self._buckets[resource]
+        while True:
+            with self._lock:
+                now = time.time()
+                delay = self._delay(bucket, now)
+                if delay <= 0:
+                    bucket.remaining -= 1
+                    bucket.lastCall = now
+                    return
+
+            if delay > self.maxWait:
+                raise RateLimited(resource, delay)
+            time.sleep(delay)
+
+    def release(self, resource: str):
+        """Give back the request taken by acquire() when it never got a response."""
+        with self._lock:
+            bucket = self._buckets[resource]
+            bucket.remaining = min(bucket.remaining + 1, bucket.limit)
+
+    def update(self, resource: str, status_code: int, headers):
+        with self._lock:
+            bucket = self._buckets.get(headers.get("X-RateLimit-Resource")) or self._buckets[resource]
+
+            if headers.get("X-RateLimit-Limit", "").isdigit():
+                bucket.limit = int(headers["X-RateLimit-Limit"])
+            if headers.get("X-RateLimit-Remaining", "").isdigit():
+                bucket.remaining = int(headers["X-RateLimit-Remaining"])
+            if headers.get("X-RateLimit-Reset", "").isdigit():
+                bucket.reset = float(headers["X-RateLimit-Reset"])
+
+            # Secondary limits come back as 403/429 with Retry-After
+            retryAfter = headers.get("Retry-After", "")
+            if status_code in (403, 429):
+                if retryAfter.isdigit():
+                    bucket.blockedUntil = time.time() + int(retryAfter)
+                elif bucket.remaining <= 0 and bucket.reset:
+                    bucket.blockedUntil = bucket.reset
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                name: {"remaining": bucket.remaining, "limit": bucket.limit, "reset": bucket.reset}
+                for name, bucket in self._buckets.items()
+            }
+
+
+githubScheduler = GitHubScheduler()
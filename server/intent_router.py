@@ -0,0 +1,92 @@
+import re
+import uuid
+
+
+# Deterministic fast path for simple edits: a message that matches one of the
+# grammars below in full is turned straight into a tool call, skipping the LLM.
+# Anything else (extra words, unquoted multi-word names, dates not in YYYY-MM-DD,
+# several edits at once) is left to the assistant.
+
+# 'Setup auth', "Setup auth", “Setup auth” or a single unquoted word
+NAME = r"""(?:'(?P<{0}1>[^']+)'|"(?P<{0}2>[^"]+)"|“(?P<{0}3>[^”]+)”|(?P<{0}4>[^\s'"“”]+))"""
+DATE = r"(?P<{0}>\d{{4}}-\d{{2}}-\d{{2}})"
+PRIORITY = r"(?P<priority>low|medium|high|immediate)"
+
+TASK = r"(?:the\s+)?task\s+" + NAME.format("subject")
+IN_PROJECT = r"\s+(?:in|of|from)\s+(?:the\s+)?project\s+" + NAME.format("project")
+PROJECT = r"(?:the\s+)?project\s+" + NAME.format("project")
+SET = r"(?:set|change|update|make|move)\s+(?:the\s+)?"
+
+GRAMMARS = [
+    ("update_task", re.compile(SET + r"priority\s+of\s+" + TASK + IN_PROJECT + r"\s+to\s+" + PRIORITY, re.IGNORECASE)),
+    ("update_task", re.compile(SET + TASK + IN_PROJECT + r"(?:'s)?\s+priority\s+to\s+" + PRIORITY, re.IGNORECASE)),
+    ("update_task", re.compile(SET + r"(?P<field>due\s+date|deadline|start\s+date)\s+of\s+" + TASK + IN_PROJECT + r"\s+to\s+" + DATE.format("date"), re.IGNORECASE)),
+    ("update_task", re.compile(r"rename\s+" + TASK + IN_PROJECT + r"\s+to\s+" + NAME.format("newName"), re.IGNORECASE)),
+    ("update_project", re.compile(r"rename\s+" + PROJECT + r"\s+to\s+" + NAME.format("newName"), re.IGNORECASE)),
+    ("update_project", re.compile(r"make\s+" + PROJECT + r"\s+(?P<visibility>public|private)", re.IGNORECASE)),
+    ("create_task", re.compile(
+        r"(?:create|add)\s+(?:a\s+)?(?:new\s+)?" + TASK + r"\s+(?:in|to)\s+(?:the\s+)?project\s+" + NAME.format("project")
+        + r"\s+from\s+" + DATE.format("start") + r"\s+(?:to|until)\s+" + DATE.format("due")
+        + r"(?:\s+with\s+" + PRIORITY + r"\s+priority)?",
+        re.IGNORECASE
+    )),
+]
+
+
+class _Function:
+    def __init__(self, name: str, parsed_arguments: dict):
+        self.name = name
+        self.parsed_arguments = parsed_arguments
+
+
+class RoutedCall:
+    """Same shape as a Backboard tool call, so the ToolExecutor can run it."""
+
+    def __init__(self, name: str, arguments: dict):
+        self.id = f"local_{uuid.uuid4().hex[:12]}"
+        self.function = _Function(name, arguments)
+
+
+def _name(match: re.Match, group: str):
+    for i in range(1, 5):
+        value = match.group(f"{group}{i}")
+        if value is not None:
+            return value.strip()
+    return None
+
+
+def _arguments(tool: str, match: re.Match) -> dict:
+    groups = match.groupdict()
+
+    if tool == "update_project":
+        args = {"name": _name(match, "project")}
+        if groups.get("visibility"):
+            args["newPublic"] = groups["visibility"].lower() == "public"
+        else:
+            args["newName"] = _name(match, "newName")
+        return args
+
+    args = {"projectName": _name(match, "project"), "subject": _name(match, "subject")}
+    if tool == "create_task":
+        args.update({"startDate": groups["start"], "dueDate": groups["due"], "priority": (groups.get("priority") or "medium").lower()})
+    elif groups.get("priority"):
+        args["newPriority"] = groups["priority"].lower()
+    elif groups.get("date"):
+        field = " ".join(groups["field"].lower().split())
+        args["newStartDate" if field == "start date" else "newDueDate"] = groups["date"]
+    else:
+        args["newSubject"] = _name(match, "newName")
+    return args
+
+
+def route(message: str):
+    """The tool call a message unambiguously asks for, or None to let the LLM handle it."""
+    text = message.strip().rstrip(".!")
+    if not text or "\n" in text:
+        return None
+
+    for tool, grammar in GRAMMARS:
+        match = grammar.fullmatch(text)
+        if match is not None:
+            return RoutedCall(tool, _arguments(tool, match))
+    return None
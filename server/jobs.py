@@ -0,0 +1,96 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from config import MAX_JOBS, JOB_TTL
+
+
+class Job:
+    def __init__(self, sessionId: str):
+        self.id = uuid.uuid4().hex
+        self.sessionId = sessionId
+        self.status = "queued"
+        self.events = []
+        self.message = None
+        self.error = None
+        self.info = {}
+        self.created = time.time()
+        self.finished = None
+        self._done = threading.Event()
+
+    def start(self):
+        self.status = "running"
+
+    def record(self, event: dict):
+        # Tokens only matter to live streams, jobs keep the tool progress
+        if event.get("type") == "tool":
+            self.events.append(event)
+
+    def finish(self, message: str = None, error: str = None):
+        self.message = message
+        self.error = error
+        self.status = "error" if error is not None else "done"
+        self.finished = time.time()
+        self._done.set()
+
+    def wait(self, timeout: float) -> bool:
+        return self._done.wait(timeout)
+
+    def to_dict(self) -> dict:
+        return {
+            "jobId": self.id,
+            "status": self.status,
+            "events": list(self.events),
+            "message": self.message,
+            "error": self.error,
+            "info": self.info,
+            "created": self.created,
+            "finished": self.finished,
+        }
+
+
+class JobTable:
+    """Bounded in-memory table of async /sendMessage runs.
+
+    Finished jobs expire after ttl seconds, and when the table is full the
+    oldest finished job makes room for the new one. Running jobs are never
+    dropped, so a table full of running jobs refuses new work instead.
+    """
+
+    def __init__(self, maxJobs: int = MAX_JOBS, ttl: float = JOB_TTL):
+        self.maxJobs = maxJobs
+        self.ttl = ttl
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self, sessionId: str):
+        with self._lock:
+            self._expire()
+            if len(self._jobs) >= self.maxJobs:
+                finished = next((jobId for jobId, job in self._jobs.items() if job.finished is not None), None)
+                if finished is None:
+                    return None
+                del self._jobs[finished]
+
+            job = Job(sessionId)
+            self._jobs[job.id] = job
+            return job
+
+    def get(self, jobId: str):
+        with self._lock:
+            self._expire()
+            return self._jobs.get(jobId)
+
+    def _expire(self):
+        cutoff = time.time() - self.ttl
+        for jobId in [jobId for jobId, job in self._jobs.items() if job.finished is not None and job.finished < cutoff]:
+            del self._jobs[jobId]
+
+    def stats(self) -> dict:
+        with self._lock:
+            running = sum(1 for job in self._jobs.values() if job.finished is None)
+            return {"jobs": len(self._jobs), "running": running}
+
+
+jobs = JobTable()
@@ -0,0 +1,149 @@
+import asyncio
+import datetime
+import re
+import threading
+
+from config import METADATA_REFRESH_INTERVAL
+from name_index import normalizeName
+
+
+DATE_RE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+# Stock OpenProject priorities, used until the instance's own list has been loaded
+DEFAULT_PRIORITIES = {
+    "low": {"id": 7, "name": "Low", "isDefault": False},
+    "normal": {"id": 8, "name": "Normal", "isDefault": True},
+    "high": {"id": 9, "name": "High", "isDefault": False},
+    "immediate": {"id": 10, "name": "Immediate", "isDefault": False},
+}
+
+# Names the tools have always accepted that OpenProject calls differently
+PRIORITY_ALIASES = {"medium": "normal", "urgent": "immediate"}
+
+# Status names treated as closed when the instance's statuses aren't known
+CLOSED_STATUSES = {"closed", "rejected"}
+
+
+def _byName(elements: list[dict]) -> dict:
+    return {normalizeName(e["name"]): e for e in elements}
+
+
+class OpenProjectMetadata:
+    """Priorities, statuses, types and the work package form schema of the instance.
+
+    Loaded once at startup (load()) and refreshed by run(). Lookups and the
+    validate* helpers are synchronous so both clients can call them before
+    sending anything: bad dates and unknown priorities are rejected locally
+    instead of costing a round trip that ends in a 422.
+    """
+
+    def __init__(self):
+        self.priorities = dict(DEFAULT_PRIORITIES)
+        self.statuses = {}
+        self.types = {}
+        self.subjectMaxLength = 255
+        self.loadedAt = None
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    async def load(self, client):
+        priorities = [p async for p in client.collection("/api/v3/priorities")]
+        statuses = [s async for s in client.collection("/api/v3/statuses")]
+        types = [t async for t in client.collection("/api/v3/types")]
+
+        schema = await client.formSchema()
+
+        with self._lock:
+            if priorities:
+                self.priorities = _byName(priorities)
+            self.statuses = _byName(statuses)
+            self.types = _byName(types)
+            self.subjectMaxLength = (schema.get("subject") or {}).get("maxLength") or 255
+            self.loadedAt = datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+    async def run(self, client, interval: float = METADATA_REFRESH_INTERVAL):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.load(client)
+            except Exception as e:
+                self.errors += 1
+                print("OpenProject metadata refresh failed:", e)
+
+    # --- lookups ---
+    def priority(self, name: str):
+        """The instance's priority for name (aliases like "medium" included), None if unknown."""
+        key = normalizeName(name)
+        with self._lock:
+            priority = self.priorities.get(key) or self.priorities.get(PRIORITY_ALIASES.get(key, ""))
+            if priority is None and key == "medium":
+                priority = next((p for p in self.priorities.values() if p.get("isDefault")), None)
+            return priority
+
+    def priorityHref(self, name: str) -> str:
+        return f"/api/v3/priorities/{self.priority(name)['id']}"
+
+    def priorityNames(self) -> list[str]:
+        with self._lock:
+            return [p["name"].lower() for p in self.priorities.values()]
+
+    def isClosed(self, status: str) -> bool:
+        key = normalizeName(status or "")
+        with self._lock:
+            entry = self.statuses.get(key)
+        return entry["isClosed"] if entry is not None else key in CLOSED_STATUSES
+
+    # --- validation ---
+    def _dateProblem(self, field: str, value: str):
+        if value is None:
+            return None
+        if not isinstance(value, str) or not DATE_RE.fullmatch(value):
+            return f"{field} {value!r} is not in YYYY-MM-DD format"
+        try:
+            datetime.date.fromisoformat(value)
+        except ValueError:
+            return f"{field} {value!r} is not a valid date"
+        return None
+
+    def validateDate(self, field: str, value: str):
+        """Raise ValueError unless value is None or a real YYYY-MM-DD date."""
+        problem = self._dateProblem(field, value)
+        if problem:
+            raise ValueError("Invalid date: " + problem)
+
+    def validateTask(self, subject: str = None, startDate: str = None, dueDate: str = None, priority: str = None):
+        """Raise ValueError naming every problem with these work package fields."""
+        problems = []
+        if subject is not None:
+            if not subject.strip():
+                problems.append("subject is empty")
+            elif len(subject) > self.subjectMaxLength:
+                problems.append(f"subject is longer than {self.subjectMaxLength} characters")
+        dateProblems = [p for p in (self._dateProblem("startDate", startDate), self._dateProblem("dueDate", dueDate)) if p]
+        problems += dateProblems
+        if startDate and dueDate and not dateProblems and startDate > dueDate:
+            problems.append(f"startDate {startDate} is after dueDate {dueDate}")
+        if priority is not None and self.priority(priority) is None:
+            problems.append(f"priority {priority!r} is not one of {', '.join(self.priorityNames())}")
+
+        if problems:
+            raise ValueError("Invalid task: " + "; ".join(problems))
+
+    def validateStatus(self, status: str):
+        with self._lock:
+            names = [s["name"] for s in self.statuses.values()]
+        if names and normalizeName(status) not in self.statuses:
+            raise ValueError(f"Unknown status {status!r}, expected one of {', '.join(names)}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "priorities": len(self.priorities),
+                "statuses": len(self.statuses),
+                "types": len(self.types),
+                "loaded_at": self.loadedAt,
+                "errors": self.errors,
+            }
+
+
+metadata = OpenProjectMetadata()
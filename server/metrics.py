@@ -0,0 +1,150 @@
+import bisect
+import contextlib
+import threading
+import time
+
+
+# Latency buckets (seconds), from a cached lookup up to a slow LLM round
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Every metric registers itself here, render() walks the list
+metrics = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labelText(names: tuple, values: tuple, le: str = None) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if le is not None:
+        pairs.append(f'le="{le}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        metrics.append(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(labels.get(n, "") for n in self.labels)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            for key, value in self._values.items():
+                lines.append(f"{self.name}{_labelText(self.labels, key)} {value}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    @contextlib.contextmanager
+    def track(self, **labels):
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                # Per-bucket (non-cumulative) counts, then sum and count
+                entry = self._values[key] = [0] * len(self.buckets) + [0, 0, 0]
+            entry[i] += 1
+            entry[-2] += value
+            entry[-1] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            for key, entry in self._values.items():
+                cumulative = 0
+                for bound, count in zip(self.buckets, entry):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{_labelText(self.labels, key, bound)} {cumulative}")
+                lines.append(f"{self.name}_bucket{_labelText(self.labels, key, '+Inf')} {entry[-1]}")
+                lines.append(f"{self.name}_sum{_labelText(self.labels, key)} {entry[-2]}")
+                lines.append(f"{self.name}_count{_labelText(self.labels, key)} {entry[-1]}")
+        return lines
+
+
+@contextlib.contextmanager
+def span(histogram: Histogram, **labels):
+    """Time the block into histogram.
+
+    Yields the label dict so the block can fill in late labels such as the
+    status code; a block that raises without setting one is tagged "error".
+    """
+    start = time.perf_counter()
+    try:
+        yield labels
+    except BaseException:
+        labels.setdefault("status", "error")
+        raise
+    finally:
+        histogram.observe(time.perf_counter() - start, **labels)
+
+
+def render() -> str:
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+requestSeconds = Histogram("assistant_request_seconds", "Time spent serving /sendMessage requests", ("route", "status"))
+llmSeconds = Histogram("assistant_llm_seconds", "Time spent waiting on Backboard (add_message and submit_tool_outputs)", ("call",))
+roundSeconds = Histogram("assistant_round_seconds", "Time per REQUIRES_ACTION round, tools and submission included")
+toolSeconds = Histogram("assistant_tool_seconds", "Time per tool execution", ("tool", "status"))
+outboundSeconds = Histogram("assistant_outbound_seconds", "Time per outbound HTTP call", ("service", "method", "status"))
+roundsPerRun = Histogram("assistant_rounds_per_run", "REQUIRES_ACTION rounds needed per run", buckets=(0, 1, 2, 3, 4, 5, 8, 13))
+runsInFlight = Gauge("assistant_runs_in_flight", "Assistant runs currently in progress")
+runsTotal = Counter("assistant_runs_total", "Assistant runs finished", ("status",))
+connectionsTotal = Counter("assistant_http_connections_total", "Outbound HTTP requests by whether they opened a new connection or reused a pooled one", ("service", "kind"))
+circuitOpen = Gauge("assistant_circuit_open", "1 while the circuit breaker of an upstream is open", ("service",))
+routesTotal = Counter("assistant_routes_total", "Messages handled by the local intent router vs the LLM", ("route",))
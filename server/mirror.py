@@ -0,0 +1,275 @@
+import asyncio
+import bisect
+import datetime
+import json
+import threading
+import time
+from collections import Counter
+
+from config import MIRROR_SYNC_INTERVAL, MIRROR_FULL_SYNC_INTERVAL, MIRROR_PAGE_SIZE
+from metadata import metadata
+from name_index import normalizeName
+
+
+def _linkId(workPackage: dict, rel: str):
+    href = ((workPackage.get("_links") or {}).get(rel) or {}).get("href") or ""
+    tail = href.rstrip("/").rsplit("/", 1)[-1]
+    return int(tail) if tail.isdigit() else None
+
+
+def _linkTitle(workPackage: dict, rel: str):
+    return ((workPackage.get("_links") or {}).get(rel) or {}).get("title")
+
+
+def _parseTime(value: str):
+    try:
+        return datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except (AttributeError, ValueError):
+        return None
+
+
+class OpenProjectMirror:
+    """In-memory copy of OpenProject projects and work packages.
+
+    Filled by sync() (a full load, then only work packages whose updatedAt
+    moved) and kept current between syncs by write-through from the clients'
+    bookkeeping helpers. Work packages are indexed by project, by
+    (project, normalized subject) and by due date.
+
+    Projects are few and have no usable updatedAt filter, so they are
+    re-listed on every sync. Deleted work packages only drop out on the next
+    full sync, which builds a fresh copy off to the side and swaps it in.
+    """
+
+    def __init__(self):
+        self.projects = {}
+        self.workPackages = {}
+        self.syncedAt = None
+        self.counters = {"hits": 0, "misses": 0, "syncs": 0, "full_syncs": 0, "fetched": 0, "errors": 0}
+        self._projectByName = {}
+        self._byProject = {}
+        self._bySubject = {}
+        self._byDue = []
+        self._since = None
+        self._lastFull = 0.0
+        self._lock = threading.RLock()
+
+    # --- store ---
+    def putProject(self, project: dict):
+        entry = {
+            "id": project["id"],
+            "name": project.get("name"),
+            "identifier": project.get("identifier"),
+            "public": project.get("public"),
+            "active": project.get("active"),
+            "updatedAt": project.get("updatedAt"),
+        }
+        self._putProject(entry)
+
+    def _putProject(self, entry: dict):
+        with self._lock:
+            old = self.projects.get(entry["id"])
+            if old is not None:
+                for name in (old["name"], old["identifier"]):
+                    if name and self._projectByName.get(normalizeName(name)) == entry["id"]:
+                        del self._projectByName[normalizeName(name)]
+            self.projects[entry["id"]] = entry
+            for name in (entry["name"], entry["identifier"]):
+                if name:
+                    self._projectByName[normalizeName(name)] = entry["id"]
+
+    def putWorkPackage(self, workPackage: dict, projectId: int = None):
+        entry = {
+            "id": workPackage["id"],
+            "projectId": _linkId(workPackage, "project") or projectId,
+            "subject": workPackage.get("subject"),
+            "lockVersion": workPackage.get("lockVersion", 0),
+            "startDate": workPackage.get("startDate"),
+            "dueDate": workPackage.get("dueDate"),
+            "status": _linkTitle(workPackage, "status"),
+            "priority": _linkTitle(workPackage, "priority"),
+            "percentageDone": workPackage.get("percentageDone"),
+            "updatedAt": workPackage.get("updatedAt"),
+        }
+        self._putWorkPackage(entry)
+
+    def _putWorkPackage(self, entry: dict):
+        with self._lock:
+            old = self.workPackages.get(entry["id"])
+            if old is not None:
+                # Keep link titles this payload doesn't carry (e.g. a trimmed PATCH response)
+                for field in ("projectId", "status", "priority"):
+                    if entry[field] is None:
+                        entry[field] = old[field]
+                self._unindex(old)
+            self.workPackages[entry["id"]] = entry
+            self._index(entry)
+
+    def removeWorkPackage(self, wpId: int):
+        with self._lock:
+            entry = self.workPackages.pop(wpId, None)
+            if entry is not None:
+                self._unindex(entry)
+
+    def _index(self, entry: dict):
+        self._byProject.setdefault(entry["projectId"], set()).add(entry["id"])
+        if entry["subject"]:
+            self._bySubject[(entry["projectId"], normalizeName(entry["subject"]))] = entry["id"]
+        if entry["dueDate"]:
+            bisect.insort(self._byDue, (entry["dueDate"], entry["id"]))
+
+    def _unindex(self, entry: dict):
+        self._byProject.get(entry["projectId"], set()).discard(entry["id"])
+        key = (entry["projectId"], normalizeName(entry["subject"] or ""))
+        if self._bySubject.get(key) == entry["id"]:
+            del self._bySubject[key]
+        if entry["dueDate"]:
+            i = bisect.bisect_left(self._byDue, (entry["dueDate"], entry["id"]))
+            if i < len(self._byDue) and self._byDue[i] == (entry["dueDate"], entry["id"]):
+                del self._byDue[i]
+
+    # --- lookups ---
+    def projectId(self, name: str):
+        """Project ID for an exact (normalized) name or identifier, None otherwise.
+
+        Never guesses: the mirror can be stale or partial, so near-misses are
+        left to the live lookup.
+        """
+        with self._lock:
+            projectId = self._projectByName.get(normalizeName(name))
+            self.counters["hits" if projectId is not None else "misses"] += 1
+            return projectId
+
+    def task(self, projectId: int, subject: str):
+        """(id, lockVersion) of the work package with exactly this subject, like getTaskId(), None otherwise."""
+        with self._lock:
+            entry = self.workPackages.get(self._bySubject.get((projectId, normalizeName(subject))))
+            self.counters["hits" if entry is not None else "misses"] += 1
+            return (entry["id"], entry["lockVersion"]) if entry is not None else None
+
+    def tasks(self, projectId: int, dueAfter: str = None, dueBefore: str = None, status: str = None) -> list[dict]:
+        with self._lock:
+            if dueAfter or dueBefore:
+                lo = bisect.bisect_left(self._byDue, (dueAfter or "",))
+                hi = bisect.bisect_right(self._byDue, (dueBefore or "9999-99-99", float("inf")))
+                ids = [wpId for _, wpId in self._byDue[lo:hi] if wpId in self._byProject.get(projectId, ())]
+            else:
+                ids = sorted(self._byProject.get(projectId, ()))
+            entries = [self.workPackages[wpId] for wpId in ids]
+
+        if status:
+            entries = [e for e in entries if (e["status"] or "").lower() == status.lower()]
+        return [dict(e) for e in entries]
+
+    def summary(self, projectId: int) -> dict:
+        today = datetime.date.today().isoformat()
+        tasks = self.tasks(projectId)
+        open_ = [t for t in tasks if (t["percentageDone"] or 0) < 100 and not metadata.isClosed(t["status"])]
+        upcoming = sorted((t for t in open_ if t["dueDate"] and t["dueDate"] >= today), key=lambda t: t["dueDate"])
+        starts = [t["startDate"] for t in tasks if t["startDate"]]
+        dues = [t["dueDate"] for t in tasks if t["dueDate"]]
+
+        with self._lock:
+            project = dict(self.projects.get(projectId) or {})
+        return {
+            "project": project,
+            "tasks": len(tasks),
+            "open": len(open_),
+            "overdue": sum(1 for t in open_ if t["dueDate"] and t["dueDate"] < today),
+            "by_status": dict(Counter(t["status"] or "unknown" for t in tasks)),
+            "by_priority": dict(Counter(t["priority"] or "unknown" for t in tasks)),
+            "start": min(starts) if starts else None,
+            "end": max(dues) if dues else None,
+            "next_due": [{"subject": t["subject"], "dueDate": t["dueDate"]} for t in upcoming[:5]],
+        }
+
+    # --- sync ---
+    async def sync(self, client, full: bool = False):
+        """Page through projects and work packages (only those updated since the last sync unless full)."""
+        started = datetime.datetime.now(datetime.timezone.utc)
+        full = full or self._since is None
+
+        projects = [project async for project in client.collection("/api/v3/projects", pageSize=MIRROR_PAGE_SIZE)]
+
+        filters = None
+        if not full:
+            # A minute of overlap covers clock skew between us and OpenProject
+            since = (self._since - datetime.timedelta(minutes=1)).strftime("%Y-%m-%dT%H:%M:%SZ")
+            filters = json.dumps([{"updatedAt": {"operator": "<>d", "values": [since, ""]}}])
+        workPackages = [
+            wp async for wp in client.collection(
+                "/api/v3/work_packages",
+                filters=filters,
+                sortBy=json.dumps([["updatedAt", "asc"]]),
+                pageSize=MIRROR_PAGE_SIZE
+            )
+        ]
+
+        if full:
+            # Rebuilt from scratch so deleted projects and work packages drop out. Built off to
+            # the side, lookups keep using the current copy until the new one is swapped in.
+            fresh = OpenProjectMirror()
+            for project in projects:
+                fresh.putProject(project)
+            for workPackage in workPackages:
+                fresh.putWorkPackage(workPackage)
+
+        with self._lock:
+            if full:
+                self._carryOver(fresh, started - datetime.timedelta(minutes=1))
+                self._swap(fresh)
+                self._lastFull = time.monotonic()
+                self.counters["full_syncs"] += 1
+            else:
+                for project in projects:
+                    self.putProject(project)
+                for workPackage in workPackages:
+                    self.putWorkPackage(workPackage)
+            self._since = started
+            self.syncedAt = started.isoformat()
+            self.counters["syncs"] += 1
+            self.counters["fetched"] += len(projects) + len(workPackages)
+
+    def _carryOver(self, fresh: "OpenProjectMirror", since: datetime.datetime):
+        """Copy entries written through while fresh was being listed into it, unless its copy is newer."""
+        for current, snapshot, put in (
+            (self.projects, fresh.projects, fresh._putProject),
+            (self.workPackages, fresh.workPackages, fresh._putWorkPackage),
+        ):
+            for entryId, entry in current.items():
+                updatedAt = _parseTime(entry["updatedAt"])
+                if updatedAt is None or updatedAt < since:
+                    continue
+                listed = snapshot.get(entryId)
+                listedAt = _parseTime(listed["updatedAt"]) if listed is not None else None
+                if listedAt is None or listedAt < updatedAt:
+                    put(dict(entry))
+
+    def _swap(self, fresh: "OpenProjectMirror"):
+        self.projects = fresh.projects
+        self.workPackages = fresh.workPackages
+        self._projectByName = fresh._projectByName
+        self._byProject = fresh._byProject
+        self._bySubject = fresh._bySubject
+        self._byDue = fresh._byDue
+
+    async def run(self, client, interval: float = MIRROR_SYNC_INTERVAL, fullInterval: float = MIRROR_FULL_SYNC_INTERVAL):
+        while True:
+            try:
+                await self.sync(client, full=time.monotonic() - self._lastFull >= fullInterval)
+            except Exception as e:
+                self.counters["errors"] += 1
+                print("OpenProject mirror sync failed:", e)
+            await asyncio.sleep(interval)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                **self.counters,
+                "projects": len(self.projects),
+                "work_packages": len(self.workPackages),
+                "synced_at": self.syncedAt,
+            }
+
+
+mirror = OpenProjectMirror()
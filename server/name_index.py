@@ -0,0 +1,92 @@
+import re
+
+from config import NAME_MATCH_THRESHOLD, NAME_MATCH_MARGIN
+
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalizeName(text: str) -> str:
+    """Lowercase with runs of whitespace collapsed, the key every name cache and index uses."""
+    return " ".join(text.lower().split())
+
+
+def trigrams(text: str) -> set[str]:
+    padded = f"  {normalizeName(text)} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def tokens(text: str) -> set[str]:
+    return set(TOKEN_RE.findall(text.lower()))
+
+
+def similarity(query: str, text: str) -> float:
+    """1.0 for the same normalized name, else the better of trigram Dice and token Jaccard.
+
+    Trigrams forgive typos and partial names, tokens forgive reordered words
+    ("auth setup" vs "Setup auth") and identifiers ("bench-seed"). Numbers
+    are never typos: "Task 100" is not "Task 1000", so differing numbers
+    halve the score.
+    """
+    if normalizeName(query) == normalizeName(text):
+        return 1.0
+    a, b = trigrams(query), trigrams(text)
+    dice = 2 * len(a & b) / (len(a) + len(b)) if a or b else 0.0
+    qa, qb = tokens(query), tokens(text)
+    jaccard = len(qa & qb) / len(qa | qb) if qa | qb else 0.0
+    score = max(dice, jaccard)
+    if {t for t in qa if t.isdigit()} != {t for t in qb if t.isdigit()}:
+        score /= 2
+    return score
+
+
+class AmbiguousName(Exception):
+    """Several entities (or only a weak one) match a name, the model has to pick."""
+
+    def __init__(self, kind: str, query: str, ranked: list[tuple]):
+        super().__init__(f"{kind} name {query!r} is ambiguous")
+        self.kind = kind
+        self.query = query
+        self.ranked = ranked
+
+    def to_dict(self) -> dict:
+        return {
+            "error": "ambiguous",
+            "kind": self.kind,
+            "query": self.query,
+            "candidates": [{"name": name, "score": round(score, 2)} for score, _, name in self.ranked[:5]],
+            "hint": f"No {self.kind} is named exactly {self.query!r}. Ask the user which candidate they mean, or retry with its exact name.",
+        }
+
+
+def choose(kind: str, query: str, ranked: list[tuple]):
+    """Key of the confident best match in ranked (score, key, name) tuples, best first.
+
+    None when there are no candidates, AmbiguousName when the best one is too
+    weak or too close to the runner-up.
+    """
+    if not ranked:
+        return None
+    score, key, _ = ranked[0]
+    if score >= NAME_MATCH_THRESHOLD and (len(ranked) == 1 or score - ranked[1][0] >= NAME_MATCH_MARGIN):
+        return key
+    raise AmbiguousName(kind, query, ranked)
+
+
+def pick(kind: str, query: str, elements: list[dict], *fields: str) -> dict:
+    """The element of an OpenProject "~" (contains) search that query means.
+
+    A lone result is taken as is, several are ranked on fields instead of
+    blindly taking the first.
+    """
+    if not elements:
+        raise LookupError(f"No {kind} matches {query!r}")
+    if len(elements) == 1:
+        return elements[0]
+    ranked = sorted(
+        ((max(similarity(query, e.get(f) or "") for f in fields), i, e.get(fields[0])) for i, e in enumerate(elements)),
+        key=lambda r: r[0],
+        reverse=True
+    )
+    return elements[choose(kind, query, ranked)]
+
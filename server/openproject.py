@@ -0,0 +1,234 @@
+import asyncio
+
+import httpx
+
+from config import CREATE_TASKS_CONCURRENCY, RESCHEDULE_CONCURRENCY
+from mirror import mirror
+from name_index import pick
+from metadata import metadata
+from transport import CircuitOpen, Upstream, openprojectHttp
+from test import (
+    projectIdCache,
+    workPackageIndex,
+    projectFilters,
+    subjectFilters,
+    projectPayload,
+    projectUpdatePayload,
+    taskPayload,
+    taskUpdatePayload,
+    scheduleParams,
+    relationFilters,
+    reschedulePlan,
+    rescheduleSummary,
+    rememberProject,
+    rememberProjectRename,
+    rememberTask,
+    rememberTaskUpdate,
+)
+
+
+class OpenProjectClient:
+    """asyncio OpenProject client used by the tools.
+
+    Builds payloads and keeps the project/work package caches through the
+    helpers in test.py, and sends everything over the pooled transport
+    (timeouts, retries, circuit breaker, see transport.py).
+    """
+
+    def __init__(self, http: Upstream = openprojectHttp):
+        self.http = http
+
+    async def close(self):
+        await self.http.aclose()
+
+    async def _request(self, method: str, path: str, timeout: float = None, **kwargs) -> httpx.Response:
+        if timeout is not None:
+            kwargs["timeout"] = timeout
+        return await self.http.arequest(method, path, **kwargs)
+
+    async def collection(self, path: str, pageSize: int = 100, **params):
+        """Yield every element of a collection, page by page (offset is OpenProject's 1-based page number)."""
+        params = {k: v for k, v in params.items() if v is not None}
+        offset, seen = 1, 0
+        while True:
+            response = await self._request("GET", path, params={**params, "offset": offset, "pageSize": pageSize})
+            response.raise_for_status()
+            page = response.json()
+            elements = page["_embedded"]["elements"]
+            for element in elements:
+                yield element
+            # Counted rather than computed from pageSize, OpenProject caps oversized pages
+            seen += len(elements)
+            if not elements or seen >= page.get("total", 0):
+                return
+            offset += 1
+
+    async def formSchema(self) -> dict:
+        # The global create form answers with the schema of the default type even without a project
+        response = await self._request("POST", "/api/v3/work_packages/form", json={})
+        response.raise_for_status()
+        return response.json()["_embedded"]["schema"]
+
+    async def getProjectId(self, name: str) -> int:
+        projectId = projectIdCache.get(name) or mirror.projectId(name)
+        if projectId is not None:
+            return projectId
+
+        response = await self._request("GET", "/api/v3/projects", params={"filters": projectFilters(name)})
+        if response.status_code != 200:
+            print("Error getting project ID:", response.status_code, response.text)
+
+        project = pick("project", name, response.json()["_embedded"]["elements"], "name", "identifier")
+        rememberProject(name, project)
+
+        return project["id"]
+
+    async def createProject(self, name: str, public: bool = True, description: str = "", statusExplanation: str = "") -> int:
+        payload = projectPayload(name, public, description, statusExplanation)
+
+        response = await self._request("POST", "/api/v3/projects", json=payload)
+        if response.status_code != 201:
+            print("Error creating project:", response.status_code, response.text)
+        else:
+            rememberProject(name, response.json())
+
+        return response.status_code
+
+    async def updateProject(self, name: str, newName: str = None, newPublic: bool = None, newDescription: str = None, newStatusExplanation: str = None) -> int:
+        projectId = await self.getProjectId(name)
+        payload = projectUpdatePayload(newName, newPublic, newDescription, newStatusExplanation)
+
+        response = await self._request("PATCH", f"/api/v3/projects/{projectId}", json=payload)
+        if response.status_code != 200:
+            print("Error updating project:", response.status_code, response.text)
+        elif newName is not None:
+            rememberProjectRename(projectId, newName, response.json())
+
+        return response.status_code
+
+    async def getTaskId(self, projectName: str, subject: str, refresh: bool = False) -> (int, int):
+        projectId = await self.getProjectId(projectName)
+        if not refresh:
+            cached = workPackageIndex.get(projectId, subject) or mirror.task(projectId, subject)
+            if cached is not None:
+                return cached
+
+        response = await self._request(
+            "GET",
+            f"/api/v3/projects/{projectId}/work_packages",
+            params={"filters": subjectFilters(subject)}
+        )
+        if response.status_code != 200:
+            print("Error getting task ID:", response.status_code, response.text)
+
+        workPackage = pick("task", subject, response.json()["_embedded"]["elements"], "subject")
+        rememberTask(projectId, workPackage, subject)
+
+        return (workPackage["id"], workPackage["lockVersion"])
+
+    async def createTask(self, projectName: str, subject: str, startDate: str, dueDate: str, description: str = "", priority: str = "medium") -> int:
+        metadata.validateTask(subject, startDate, dueDate, priority)
+        projectId = await self.getProjectId(projectName)
+        payload = taskPayload(subject, startDate, dueDate, description, priority)
+
+        response = await self._request("POST", f"/api/v3/projects/{projectId}/work_packages", json=payload)
+        if response.status_code != 201:
+            print("Error creating task:", response.status_code, response.text)
+        else:
+            rememberTask(projectId, response.json(), subject)
+
+        return response.status_code
+
+    async def createTasks(self, projectName: str, tasks: list[dict], maxConcurrency: int = CREATE_TASKS_CONCURRENCY) -> list[int]:
+        # Reject the whole batch before anything is created if one task is invalid
+        for task in tasks:
+            metadata.validateTask(task["subject"], task["startDate"], task["dueDate"], task.get("priority", "medium"))
+
+        # Resolve the project once so every POST hits the cache instead of /api/v3/projects
+        await self.getProjectId(projectName)
+        semaphore = asyncio.Semaphore(max(1, maxConcurrency))
+
+        async def create(task: dict) -> int:
+            async with semaphore:
+                try:
+                    return await self.createTask(
+                        projectName,
+                        task["subject"],
+                        task["startDate"],
+                        task["dueDate"],
+                        task.get("description", ""),
+                        task.get("priority", "medium")
+                    )
+                except Exception as e:
+                    print("Error creating task:", task.get("subject"), e)
+                    return 0
+
+        return list(await asyncio.gather(*(create(task) for task in tasks)))
+
+    async def updateTask(self, projectName: str, subject: str, newSubject: str = None, newDescription: str = None, newStartDate: str = None, newDueDate: str = None, newPriority: str = None) -> int:
+        metadata.validateTask(newSubject, newStartDate, newDueDate, newPriority)
+        taskId, lockVersion = await self.getTaskId(projectName, subject)
+        payload = taskUpdatePayload(lockVersion, newSubject, newDescription, newStartDate, newDueDate, newPriority)
+
+        response = await self._request("PATCH", f"/api/v3/work_packages/{taskId}", json=payload)
+
+        # Someone else touched the task since we indexed it: refresh the lockVersion once and retry
+        if response.status_code == 409:
+            workPackageIndex.invalidate(taskId)
+            taskId, payload["lockVersion"] = await self.getTaskId(projectName, subject, refresh=True)
+            response = await self._request("PATCH", f"/api/v3/work_packages/{taskId}", json=payload)
+
+        if response.status_code != 200:
+            print("Error updating task:", response.status_code, response.text)
+        else:
+            rememberTaskUpdate(await self.getProjectId(projectName), taskId, response.json(), newSubject is not None)
+
+        return response.status_code
+
+    async def rescheduleProject(self, projectName: str, days: int, subject: str = None, fromDate: str = None, maxConcurrency: int = RESCHEDULE_CONCURRENCY) -> dict:
+        # reschedulePlan compares fromDate to the tasks' dates as strings, a bad value would skip or shift the wrong tasks
+        metadata.validateDate("fromDate", fromDate)
+        projectId = await self.getProjectId(projectName)
+
+        # Every work package of the project in as few pages as possible
+        workPackages = [wp async for wp in self.collection(f"/api/v3/projects/{projectId}/work_packages", **scheduleParams())]
+
+        relations = []
+        if subject is not None:
+            ids = [wp["id"] for wp in workPackages]
+            for i in range(0, len(ids), 100):
+                relations += [r async for r in self.collection("/api/v3/relations", pageSize=1000, filters=relationFilters(ids[i:i + 100]))]
+
+        plan = reschedulePlan(workPackages, relations, days, subject, fromDate)
+        lockVersions = {wp["id"]: wp["lockVersion"] for wp in workPackages}
+        semaphore = asyncio.Semaphore(max(1, maxConcurrency))
+
+        async def patch(wpId: int) -> int:
+            startDate, dueDate = plan[wpId]
+            payload = {"lockVersion": lockVersions[wpId], "startDate": startDate, "dueDate": dueDate}
+            async with semaphore:
+                try:
+                    response = await self._request("PATCH", f"/api/v3/work_packages/{wpId}", json=payload)
+
+                    # Changed since the listing (OpenProject may also have moved it along with a predecessor):
+                    # take the fresh lockVersion and set the same target dates again
+                    if response.status_code == 409:
+                        current = await self._request("GET", f"/api/v3/work_packages/{wpId}")
+                        if current.status_code == 200:
+                            payload["lockVersion"] = current.json()["lockVersion"]
+                            response = await self._request("PATCH", f"/api/v3/work_packages/{wpId}", json=payload)
+                except (httpx.TransportError, CircuitOpen) as e:
+                    print("Error rescheduling task:", wpId, e)
+                    return 0
+
+            if response.status_code != 200:
+                print("Error rescheduling task:", wpId, response.status_code, response.text)
+            else:
+                rememberTaskUpdate(projectId, wpId, response.json(), False)
+            return response.status_code
+
+        results = dict(zip(plan, await asyncio.gather(*(patch(wpId) for wpId in plan))))
+        return rescheduleSummary(projectName, days, workPackages, plan, results)
+
+
+openproject = OpenProjectClient()
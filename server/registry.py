@@ -0,0 +1,125 @@
+import asyncio
+import contextlib
+import fcntl
+import hashlib
+import json
+import os
+import threading
+import time
+
+from config import REGISTRY_PATH, MAX_THREADS
+
+
+def fingerprint(definition: dict) -> str:
+    """Stable hash of an assistant definition (name, instructions, tool schemas)."""
+    encoded = json.dumps(definition, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+class AssistantRegistry:
+    """Local JSON file remembering the Backboard assistant and per-session thread ids.
+
+    The assistant is stored under the fingerprint of its definition, so a
+    restart (or another worker) reuses it as long as the instructions and
+    tool schemas are unchanged; any change creates a fresh assistant and
+    drops the threads that belonged to the old one. Writes happen under an
+    exclusive file lock so several worker processes can share the file.
+    """
+
+    def __init__(self, path: str = REGISTRY_PATH, maxThreads: int = MAX_THREADS):
+        self.path = path
+        self.maxThreads = maxThreads
+        self.counters = {"reused": 0, "created": 0}
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def locked(self):
+        """Hold the registry across processes, e.g. around a check-then-create."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock, open(self.path + ".lock", "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    @contextlib.asynccontextmanager
+    async def alocked(self):
+        """locked() for coroutines, waiting for the lock in a worker thread instead of on the loop."""
+        lock = self.locked()
+        await asyncio.to_thread(lock.__enter__)
+        try:
+            yield
+        finally:
+            await asyncio.to_thread(lock.__exit__, None, None, None)
+
+    def _load(self) -> dict:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {"fingerprint": None, "assistant_id": None, "threads": {}}
+        data.setdefault("threads", {})
+        return data
+
+    def _save(self, data: dict):
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print("Registry write failed:", e)
+
+    def assistant(self, key: str):
+        """The stored assistant id for this fingerprint, or None. Call inside locked()."""
+        data = self._load()
+        if data["fingerprint"] == key and data["assistant_id"]:
+            self.counters["reused"] += 1
+            return data["assistant_id"]
+        return None
+
+    def set_assistant(self, key: str, assistantId: str):
+        """Record a newly created assistant. Call inside locked()."""
+        self.counters["created"] += 1
+        self._save({"fingerprint": key, "assistant_id": assistantId, "threads": {}})
+
+    def thread(self, sessionId: str):
+        """The stored thread id for this session, or None. Marks the session as used."""
+        with self.locked():
+            data = self._load()
+            entry = data["threads"].get(sessionId)
+            if entry is None:
+                return None
+            entry["used"] = time.time()
+            self._save(data)
+            return entry["thread_id"]
+
+    def touch(self, sessionId: str):
+        """Mark the session as used so it is evicted last."""
+        with self.locked():
+            data = self._load()
+            entry = data["threads"].get(sessionId)
+            if entry is not None:
+                entry["used"] = time.time()
+                self._save(data)
+
+    def set_thread(self, sessionId: str, threadId: str):
+        with self.locked():
+            data = self._load()
+            threads = data["threads"]
+            threads[sessionId] = {"thread_id": threadId, "used": time.time()}
+
+            # Keep the file bounded, the least recently used sessions go first
+            if len(threads) > self.maxThreads:
+                for old in sorted(threads, key=lambda s: threads[s]["used"])[:len(threads) - self.maxThreads]:
+                    del threads[old]
+            self._save(data)
+
+    def stats(self) -> dict:
+        return dict(self.counters)
+
+
+registry = AssistantRegistry()
@@ -1,51 +1,153 @@
-import requests
+import datetime
 import json
+import threading
+import time
 
-from config import OPENPROJECT_API_KEY
+from config import PROJECT_CACHE_TTL
+from mirror import mirror
+from name_index import normalizeName
+from metadata import metadata
 
 
-# Setup a session
-session = requests.Session()
-session.auth = ("apikey", OPENPROJECT_API_KEY)
+# Caches, payload builders and bookkeeping shared by the OpenProject client in openproject.py
 
-baseUrl = "https://openproject.chiem.me"
 
-PRIORITIES = {
-    "low": 7,
-    "medium": 8,
-    "high": 9,
-    "immediate": 10
-}
+# --- project name -> ID resolver cache ---
+def _identifierFor(name: str) -> str:
+    return name.lower().replace(" ", "-")
 
-def getProjectId(name: str) -> int:
-    url = f"{baseUrl}/api/v3/projects"
-    
-    filters = [
+
+class ProjectIdCache:
+    """Maps normalized project names and identifiers to project IDs for ttl seconds."""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str):
+        key = normalizeName(name)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, projectId: int, *names: str):
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            for name in names:
+                if name:
+                    self._entries[normalizeName(name)] = (projectId, expires)
+
+    def invalidate(self, projectId: int):
+        with self._lock:
+            for key in [k for k, (pid, _) in self._entries.items() if pid == projectId]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+
+projectIdCache = ProjectIdCache(PROJECT_CACHE_TTL)
+# -----------------------------------------
+
+
+# --- (project ID, subject) -> work package index ---
+class WorkPackageIndex:
+    """Keeps work package ids and lockVersions together so updates skip the lookup GETs."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._byKey = {}
+        self._byId = {}
+        self._lock = threading.Lock()
+
+    def get(self, projectId: int, subject: str):
+        key = (projectId, normalizeName(subject))
+        with self._lock:
+            entry = self._byId.get(self._byKey.get(key))
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return (entry["id"], entry["lockVersion"])
+
+    def put(self, projectId: int, workPackage: dict, *subjects: str):
+        wpId = workPackage["id"]
+        with self._lock:
+            self._byId[wpId] = {
+                "id": wpId,
+                "lockVersion": workPackage.get("lockVersion", 0),
+                "projectId": projectId,
+            }
+            for subject in (*subjects, workPackage.get("subject")):
+                if subject:
+                    self._byKey[(projectId, normalizeName(subject))] = wpId
+
+    def setLockVersion(self, wpId: int, lockVersion: int):
+        with self._lock:
+            if wpId in self._byId:
+                self._byId[wpId]["lockVersion"] = lockVersion
+
+    def invalidate(self, wpId: int):
+        with self._lock:
+            self._byId.pop(wpId, None)
+            for key in [k for k, v in self._byKey.items() if v == wpId]:
+                del self._byKey[key]
+
+    def clear(self):
+        with self._lock:
+            self._byKey.clear()
+            self._byId.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._byId)}
+
+
+workPackageIndex = WorkPackageIndex()
+# ---------------------------------------------------
+
+
+# --- request payloads (shared with the async client in openproject.py) ---
+def projectFilters(name: str) -> str:
+    return json.dumps([
         {
             "name_and_identifier": {
                 "operator": "~",
                 "values": [name]
             }
         }
-    ]
-
-    headers = {
-        "Content-Type": "application/json"
-    }
-
-    response = session.get(url, params={"filters": json.dumps(filters)}, headers=headers)
-    if response.status_code != 200:
-        print("Error getting project ID:", response.status_code, response.text)
+    ])
 
-    return response.json()["_embedded"]["elements"][0]["id"]
+def subjectFilters(subject: str) -> str:
+    return json.dumps([
+        {
+            "subject": {
+                "operator": "~",
+                "values": [subject]
+            }
+        }
+    ])
 
-def createProject(name: str, public: bool = True, description: str = "", statusExplanation: str = "") -> int:
-    url = f"{baseUrl}/api/v3/projects"
-    
-    payload = {
+def projectPayload(name: str, public: bool = True, description: str = "", statusExplanation: str = "") -> dict:
+    return {
         "_type": "Project",
         "name": name,
-        "identifier": name.lower().replace(" ", "-"),
+        "identifier": _identifierFor(name),
         "active": True,
         "public": public,
         "description": {
@@ -57,32 +159,21 @@ def createProject(name: str, public: bool = True, description: str = "", statusE
             "raw": statusExplanation
         },
         "_links": {
+            # Project status ids are fixed codes in OpenProject, not instance data
             "status": {
                 "href": "/api/v3/project_statuses/not_started"
             }
         }
     }
 
-    headers = {
-        "Content-Type": "application/json"
-    }
-
-    response = session.post(url, json=payload, headers=headers)
-    if response.status_code != 201:
-        print("Error creating project:", response.status_code, response.text)
-    
-    return response.status_code
-
-def updateProject(name: str, newName: str = None, newPublic: bool = None, newDescription: str = None, newStatusExplanation: str = None) -> int:
-    url = f"{baseUrl}/api/v3/projects/{getProjectId(name)}"
-    
+def projectUpdatePayload(newName: str = None, newPublic: bool = None, newDescription: str = None, newStatusExplanation: str = None) -> dict:
     payload = {
         "_type": "Project",
     }
     
     if newName is not None:
         payload["name"] = newName
-        payload["identifier"] = newName.lower().replace(" ", "-")
+        payload["identifier"] = _identifierFor(newName)
     if newPublic is not None:
         payload["public"] = newPublic
     if newDescription is not None:
@@ -96,42 +187,10 @@ def updateProject(name: str, newName: str = None, newPublic: bool = None, newDes
             "raw": newStatusExplanation
         }
 
-    headers = {
-        "Content-Type": "application/json"
-    }
-
-    response = session.patch(url, json=payload, headers=headers)
-    if response.status_code != 200:
-        print("Error updating project:", response.status_code, response.text)
-    
-    return response.status_code
+    return payload
 
-def getTaskId(projectName: str, subject: str) -> (int, int):
-    url = f"{baseUrl}/api/v3/projects/{getProjectId(projectName)}/work_packages"
-    
-    filters = [
-        {
-            "subject": {
-                "operator": "~",
-                "values": [subject]
-            }
-        }
-    ]
-
-    headers = {
-        "Content-Type": "application/json"
-    }
-
-    response = session.get(url, params={"filters": json.dumps(filters)}, headers=headers)
-    if response.status_code != 200:
-        print("Error getting task ID:", response.status_code, response.text)
-
-    return (response.json()["_embedded"]["elements"][0]["id"], response.json()["_embedded"]["elements"][0]["lockVersion"])
-
-def createTask(projectName: str, subject: str, startDate: str, dueDate: str, description: str = "", priority: str = "medium") -> int:
-    url = f"{baseUrl}/api/v3/projects/{getProjectId(projectName)}/work_packages"
-
-    payload = {
+def taskPayload(subject: str, startDate: str, dueDate: str, description: str = "", priority: str = "medium") -> dict:
+    return {
         "subject": subject,
         "description": {
             "format": "markdown",
@@ -141,25 +200,13 @@ def createTask(projectName: str, subject: str, startDate: str, dueDate: str, des
         "dueDate": dueDate,
         "percentageDone": 0,
         "_links": {
-            "priority": { "href": f"/api/v3/priorities/{PRIORITIES[priority]}" }
+            "priority": { "href": metadata.priorityHref(priority) }
         }
     }
 
-    headers = {
-        "Content-Type": "application/json"
-    }
-
-    response = session.post(url, json=payload, headers=headers)
-    if response.status_code != 201:
-        print("Error creating task:", response.status_code, response.text)
-    
-    return response.status_code
-
-def updateTask(projectName: str, subject: str, newSubject: str = None, newDescription: str = None, newStartDate: str = None, newDueDate: str = None, newPriority: str = None) -> int:
-    url = f"{baseUrl}/api/v3/work_packages/{getTaskId(projectName, subject)[0]}"
-    
+def taskUpdatePayload(lockVersion: int, newSubject: str = None, newDescription: str = None, newStartDate: str = None, newDueDate: str = None, newPriority: str = None) -> dict:
     payload = {
-        "lockVersion": getTaskId(projectName, subject)[1]
+        "lockVersion": lockVersion
     }
     
     if newSubject is not None:
@@ -175,24 +222,133 @@ def updateTask(projectName: str, subject: str, newSubject: str = None, newDescri
         payload["dueDate"] = newDueDate
     if newPriority is not None:
         payload["_links"] = {
-            "priority": { "href": f"/api/v3/priorities/{PRIORITIES[newPriority]}" }
+            "priority": { "href": metadata.priorityHref(newPriority) }
         }
 
-    headers = {
-        "Content-Type": "application/json"
+    return payload
+
+def scheduleParams() -> dict:
+    # Pages as large as OpenProject allows, trimmed to the fields rescheduling needs
+    return {
+        "pageSize": 1000,
+        "select": "total,count,elements/id,elements/subject,elements/lockVersion,elements/startDate,elements/dueDate",
     }
 
-    response = session.patch(url, json=payload, headers=headers)
-    if response.status_code != 200:
-        print("Error updating project:", response.status_code, response.text)
-    
-    return response.status_code
+def relationFilters(wpIds: list[int]) -> str:
+    return json.dumps([
+        {
+            "involved": {
+                "operator": "=",
+                "values": [str(wpId) for wpId in wpIds]
+            }
+        },
+        {
+            "type": {
+                "operator": "=",
+                "values": ["precedes", "follows"]
+            }
+        }
+    ])
+# -------------------------------------------------------------------------
+
+
+# --- rescheduling (shared with the async client in openproject.py) ---
+def _shiftDate(value: str, days: int):
+    if not value:
+        return value
+    return (datetime.date.fromisoformat(value) + datetime.timedelta(days=days)).isoformat()
+
+def _hrefId(relation: dict, rel: str) -> int:
+    return int(relation["_links"][rel]["href"].rstrip("/").rsplit("/", 1)[-1])
+
+def reschedulePlan(workPackages: list[dict], relations: list[dict], days: int, subject: str = None, fromDate: str = None) -> dict:
+    """New (startDate, dueDate) per work package id.
+
+    Without a subject every task (or every task starting on or after fromDate)
+    moves by days. With a subject only that task moves by days, then the tasks
+    that follow it (precedes/follows relations, transitively) are pushed just
+    far enough to start after their predecessor ends plus the relation's lag.
+    """
+    byId = {wp["id"]: wp for wp in workPackages}
+    dates = {wpId: (wp.get("startDate"), wp.get("dueDate")) for wpId, wp in byId.items()}
+
+    if subject is None:
+        return {
+            wpId: (_shiftDate(start, days), _shiftDate(due, days))
+            for wpId, (start, due) in dates.items()
+            if (start or due) and not (fromDate and (start or due) < fromDate)
+        }
+
+    root = next((wpId for wpId, wp in byId.items() if normalizeName(wp["subject"]) == normalizeName(subject)), None)
+    if root is None:
+        raise ValueError(f"No task named {subject!r} in this project")
+
+    successors = {}
+    for relation in relations:
+        source, target = _hrefId(relation, "from"), _hrefId(relation, "to")
+        if relation["type"] == "follows":
+            source, target = target, source
+        successors.setdefault(source, []).append((target, relation.get("lag") or 0))
+
+    plan = {root: tuple(_shiftDate(d, days) for d in dates[root])}
+    queue = [root]
+    while queue:
+        predecessor = queue.pop(0)
+        end = plan[predecessor][1] or plan[predecessor][0]
+        if not end:
+            continue
+        for successor, lag in successors.get(predecessor, []):
+            if successor not in byId:
+                continue
+            start, due = plan.get(successor, dates[successor])
+            earliest = _shiftDate(end, 1 + lag)
+            if not start or start >= earliest:
+                continue
+            delta = (datetime.date.fromisoformat(earliest) - datetime.date.fromisoformat(start)).days
+            plan[successor] = (earliest, _shiftDate(due, delta))
+            queue.append(successor)
+    return plan
+
+def rescheduleSummary(projectName: str, days: int, workPackages: list[dict], plan: dict, results: dict) -> dict:
+    byId = {wp["id"]: wp for wp in workPackages}
+    failed = [{"subject": byId[wpId]["subject"], "status_code": code} for wpId, code in results.items() if code != 200]
+    starts = [start for start, _ in plan.values() if start]
+    dues = [due for _, due in plan.values() if due]
+    return {
+        "projectName": projectName,
+        "days": days,
+        "shifted": len(plan) - len(failed),
+        "unchanged": len(workPackages) - len(plan),
+        "failed": failed,
+        "start": min(starts) if starts else None,
+        "end": max(dues) if dues else None,
+        "status_code": failed[0]["status_code"] if failed else 200,
+    }
+# ----------------------------------------------------------------------
+
+
+# --- cache bookkeeping after successful responses ---
+# Writes also go through to the local mirror so list_tasks/get_project_summary see them before the next sync
+def rememberProject(name: str, project: dict):
+    projectIdCache.put(project["id"], name, project.get("name"), project.get("identifier"))
+    mirror.putProject(project)
+
+def rememberProjectRename(projectId: int, newName: str, project: dict):
+    # The old name (and anything that matched it) now points at a renamed project
+    projectIdCache.invalidate(projectId)
+    projectIdCache.put(projectId, newName, project.get("identifier"))
+    mirror.putProject(project)
 
+def rememberTask(projectId: int, workPackage: dict, subject: str = None):
+    workPackageIndex.put(projectId, workPackage, subject)
+    mirror.putWorkPackage(workPackage, projectId)
 
-if __name__ == "__main__":
-    #print(createProject("Great project", True))
-    #print(updateProject("Super duper project", newName="Wow great name", newDescription="This is an updated description."))
-    #print(createTask("Wow great name", "New task", "Set up user authentication using OAuth2.", "2024-07-01", "2024-07-07", "high"))
-    #print(getTaskId("Wow great name", "Another task"))
-    #print(updateTask("Wow great name", "Another task", newSubject="New Task Name"))
-    pass
+def rememberTaskUpdate(projectId: int, taskId: int, workPackage: dict, renamed: bool):
+    if renamed:
+        # The old subject no longer points at this task
+        workPackageIndex.invalidate(taskId)
+        workPackageIndex.put(projectId, workPackage)
+    else:
+        workPackageIndex.setLockVersion(taskId, workPackage["lockVersion"])
+    mirror.putWorkPackage(workPackage, projectId)
+# ----------------------------------------------------
@@ -0,0 +1,64 @@
+import asyncio
+import contextlib
+from collections import OrderedDict
+
+from config import MAX_THREADS
+
+
+class ThreadManager:
+    """Maps a session id to its own Backboard thread.
+
+    Threads are created lazily on a session's first message and the least
+    recently used ones are forgotten once more than maxThreads are live. Runs
+    on the same thread are serialized (Backboard allows one active run per
+    thread), runs on different threads proceed concurrently.
+
+    With a registry, thread ids survive restarts, a session only gets a new
+    thread if none is recorded.
+    """
+
+    def __init__(self, client, assistantId: str, maxThreads: int = MAX_THREADS, registry=None):
+        self.client = client
+        self.assistantId = assistantId
+        self.maxThreads = maxThreads
+        self.registry = registry
+        self._threads = OrderedDict()
+        self._locks = {}
+
+    @contextlib.asynccontextmanager
+    async def session(self, sessionId: str):
+        lock = self._locks.setdefault(sessionId, asyncio.Lock())
+        async with lock:
+            threadId = self._threads.get(sessionId)
+            if threadId is None:
+                if self.registry is not None:
+                    threadId = await asyncio.to_thread(self.registry.thread, sessionId)
+                if threadId is None:
+                    thread = await self.client.create_thread(self.assistantId)
+                    threadId = str(thread.thread_id)
+                    if self.registry is not None:
+                        await asyncio.to_thread(self.registry.set_thread, sessionId, threadId)
+                self._threads[sessionId] = threadId
+                self._evict()
+            else:
+                self._threads.move_to_end(sessionId)
+                if self.registry is not None:
+                    await asyncio.to_thread(self.registry.touch, sessionId)
+
+            yield threadId
+
+    def _evict(self):
+        for sessionId in list(self._threads):
+            if len(self._threads) <= self.maxThreads:
+                break
+            # Never drop a session that is mid-run or has messages waiting
+            if self._locks[sessionId].locked():
+                continue
+            del self._threads[sessionId]
+            del self._locks[sessionId]
+
+    def stats(self) -> dict:
+        return {
+            "threads": len(self._threads),
+            "active": sum(1 for lock in self._locks.values() if lock.locked()),
+        }
@@ -0,0 +1,135 @@
+import asyncio
+import contextvars
+import functools
+import inspect
+import json
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config import TOOL_WORKERS, TOOL_CONCURRENCY
+from metrics import toolSeconds, span
+from tracing import currentTrace
+from name_index import AmbiguousName, normalizeName
+
+
+STATUS_RE = re.compile(r'"status_code": (\d+)')
+
+# Run before the rest of a round, other calls may need the project they create or rename
+PROJECT_SETUP_TOOLS = {"create_project", "update_project"}
+
+
+def _status_of(result: dict) -> str:
+    """Status tag for a tool result: the first upstream status code, else ok/error."""
+    output = result.get("output") or ""
+    match = STATUS_RE.search(output)
+    if match:
+        return match.group(1)
+    return "error" if output.startswith('{"error"') else "ok"
+
+
+def _scope(tc) -> tuple[set, set]:
+    """(project names, task subjects) a call touches, no subjects when it touches the whole project."""
+    args = getattr(tc.function, "parsed_arguments", None) or {}
+    projects = {normalizeName(args[key]) for key in ("projectName", "name", "newName") if isinstance(args.get(key), str)} - {""}
+    subjects = set()
+    if "subject" in args:
+        subjects = {normalizeName(args[key]) for key in ("subject", "newSubject") if isinstance(args.get(key), str)} - {""}
+    return projects, subjects
+
+
+def _conflicts(a: tuple[set, set], b: tuple[set, set]) -> bool:
+    if not a[0] & b[0]:
+        return False
+    # Same project: only calls on two different tasks of it may overlap
+    return not a[1] or not b[1] or bool(a[1] & b[1])
+
+
+class ToolExecutor:
+    """Runs the tool calls of one REQUIRES_ACTION round, concurrently where they are independent.
+
+    Blocking (sync HTTP) tools run on a shared thread pool so they never
+    stall the event loop, coroutine tools are awaited directly. Each tool has
+    its own semaphore, shared by every conversation, so a burst of calls can't
+    overwhelm a single upstream.
+    """
+
+    def __init__(self, maxWorkers: int = TOOL_WORKERS, defaultLimit: int = TOOL_CONCURRENCY):
+        self.defaultLimit = defaultLimit
+        self._tools = {}
+        self._semaphores = {}
+        self._pool = ThreadPoolExecutor(max_workers=maxWorkers, thread_name_prefix="tool")
+
+    def register(self, name: str, handler, label: str = None, limit: int = None):
+        self._tools[name] = {
+            "handler": handler,
+            "label": label,
+            "limit": limit or self.defaultLimit,
+        }
+
+    def _semaphore(self, name: str) -> asyncio.Semaphore:
+        if name not in self._semaphores:
+            self._semaphores[name] = asyncio.Semaphore(self._tools[name]["limit"])
+        return self._semaphores[name]
+
+    async def run(self, tc, onResult=None) -> dict:
+        tool_name = tc.function.name
+        tool = self._tools.get(tool_name)
+        if tool is None:
+            return {"tool_call_id": tc.id, "output": json.dumps({"error": f"Unknown tool {tool_name}"})}
+
+        async with self._semaphore(tool_name):
+            if tool["label"]:
+                print(tool["label"])
+            started = time.perf_counter()
+            with span(toolSeconds, tool=tool_name) as labels:
+                try:
+                    if inspect.iscoroutinefunction(tool["handler"]):
+                        result = await tool["handler"](tc)
+                    else:
+                        loop = asyncio.get_running_loop()
+                        # Carry the run's context variables (e.g. its output budget) into the worker thread
+                        call = functools.partial(contextvars.copy_context().run, tool["handler"], tc)
+                        result = await loop.run_in_executor(self._pool, call)
+                except AmbiguousName as e:
+                    # Structured so the model can pick a candidate (or ask the user) and retry
+                    result = {"tool_call_id": tc.id, "output": json.dumps(e.to_dict())}
+                except Exception as e:
+                    result = {"tool_call_id": tc.id, "output": json.dumps({"error": str(e)})}
+                labels["status"] = _status_of(result)
+
+            trace = currentTrace.get()
+            if trace is not None:
+                trace.tool(tc, result, time.perf_counter() - started)
+
+        if onResult is not None:
+            onResult(tc, result)
+
+        return result
+
+    async def _run_after(self, earlier: list, tc, onResult=None) -> dict:
+        if earlier:
+            await asyncio.wait(earlier)
+        return await self.run(tc, onResult)
+
+    async def run_all(self, tool_calls: list, onResult=None) -> list[dict]:
+        """Run one round of tool calls, results in the same order as tool_calls.
+
+        create_project/update_project calls finish before anything else starts.
+        A call that touches the same project or task as an earlier one waits for
+        it, independent calls run concurrently. onResult fires as each one finishes.
+        """
+        scopes = [_scope(tc) for tc in tool_calls]
+        setup = [i for i, tc in enumerate(tool_calls) if tc.function.name in PROJECT_SETUP_TOOLS]
+        rest = [i for i, tc in enumerate(tool_calls) if tc.function.name not in PROJECT_SETUP_TOOLS]
+
+        results = {}
+        for phase in (setup, rest):
+            tasks = {}
+            for position, i in enumerate(phase):
+                earlier = [tasks[j] for j in phase[:position] if _conflicts(scopes[i], scopes[j])]
+                tasks[i] = asyncio.ensure_future(self._run_after(earlier, tool_calls[i], onResult))
+            if tasks:
+                await asyncio.wait(tasks.values())
+            results.update((i, task.result()) for i, task in tasks.items())
+        return [results[i] for i in range(len(tool_calls))]
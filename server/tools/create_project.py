@@ -1,4 +1,4 @@
-from test import createProject
+from openproject import openproject
 import json
 
 create_project_tool = {
@@ -19,7 +19,7 @@ create_project_tool = {
         }
     }
 
-def create_project(tc) -> dict[str, int]:
+async def create_project(tc) -> dict[str, int]:
     # Get parsed arguments (required parameters are guaranteed by API)
     args = tc.function.parsed_arguments
     name = args["name"]
@@ -28,7 +28,7 @@ def create_project(tc) -> dict[str, int]:
     status_explanation = args.get("status_explanation", "")
 
     # Call the actual function to create the project
-    status_code = createProject(name, public, description, status_explanation)
+    status_code = await openproject.createProject(name, public, description, status_explanation)
 
     projectData = {
         "name": name,
@@ -1,4 +1,4 @@
-from test import createTask
+from openproject import openproject
 import json
 
 create_task_tool = {
@@ -21,7 +21,7 @@ create_task_tool = {
         }
     }
 
-def create_task(tc) -> dict[str, int]:
+async def create_task(tc) -> dict[str, int]:
     # Get parsed arguments (required parameters are guaranteed by API)
     args = tc.function.parsed_arguments
     projectName = args["projectName"]
@@ -32,7 +32,7 @@ def create_task(tc) -> dict[str, int]:
     priority = args.get("priority", "medium")
 
     # Call the actual function to create the project
-    status_code = createTask(projectName, subject, startDate, dueDate, description, priority)
+    status_code = await openproject.createTask(projectName, subject, startDate, dueDate, description, priority)
 
     taskData = {
         "projectName": projectName,
@@ -0,0 +1,54 @@
+from openproject import openproject
+import json
+
+create_tasks_tool = {
+        "type": "function",
+        "function": {
+            "name": "create_tasks",
+            "description": "Create several tasks for a project in one call, each with a subject, description, start date, due date, and priority level. Prefer this over create_task when creating more than one task",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "projectName": {"type": "string", "description": "Project name to which the tasks belong"},
+                    "tasks": {
+                        "type": "array",
+                        "description": "Tasks to create",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "subject": {"type": "string", "description": "Task subject/title"},
+                                "description": {"type": "string", "description": "Task description"},
+                                "startDate": {"type": "string", "description": "Task start date in YYYY-MM-DD format"},
+                                "dueDate": {"type": "string", "description": "Task due date in YYYY-MM-DD format"},
+                                "priority": {"type": "string", "description": "Task priority level (low, medium, high, immediate)"}
+                            },
+                            "required": ["subject", "startDate", "dueDate"]
+                        }
+                    }
+                },
+                "required": ["projectName", "tasks"]
+            }
+        }
+    }
+
+async def create_tasks(tc) -> dict[str, int]:
+    # Get parsed arguments (required parameters are guaranteed by API)
+    args = tc.function.parsed_arguments
+    projectName = args["projectName"]
+    tasks = args["tasks"]
+
+    # Call the actual function to create the tasks concurrently
+    status_codes = await openproject.createTasks(projectName, tasks)
+
+    tasksData = {
+        "projectName": projectName,
+        "tasks": [
+            {"subject": task.get("subject"), "status_code": status_code}
+            for task, status_code in zip(tasks, status_codes)
+        ]
+    }
+    
+    return {
+        "tool_call_id": tc.id,
+        "output": json.dumps(tasksData)
+    }
@@ -0,0 +1,38 @@
+from openproject import openproject
+from mirror import mirror
+import json
+
+get_project_summary_tool = {
+        "type": "function",
+        "function": {
+            "name": "get_project_summary",
+            "description": "Summarize a project: task counts by status and priority, open and overdue tasks, overall timeline and the next tasks due",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "projectName": {"type": "string", "description": "Project name"}
+                },
+                "required": ["projectName"]
+            }
+        }
+    }
+
+async def get_project_summary(tc) -> dict[str, int]:
+    # Get parsed arguments (required parameters are guaranteed by API)
+    args = tc.function.parsed_arguments
+    projectName = args["projectName"]
+
+    # Answered from the local mirror, loaded on first use when the background sync is off
+    if mirror.syncedAt is None:
+        await mirror.sync(openproject)
+    projectId = await openproject.getProjectId(projectName)
+
+    summaryData = {
+        "projectName": projectName,
+        **mirror.summary(projectId)
+    }
+
+    return {
+        "tool_call_id": tc.id,
+        "output": json.dumps(summaryData)
+    }
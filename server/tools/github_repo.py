@@ -1,30 +1,18 @@
 from config import GITHUB_TOKEN
+from github_api import GITHUB_API_BASE, GITHUB_GRAPHQL_URL, github_headers, scheduled_request, cached_get, resolve_sha
+from github_cache import githubCache
+from github_ratelimit import RateLimited
+from code_index import codeIndex
+from excerpt import shape_content
 import json
 import base64
-import requests
-
-
-
-GITHUB_API_BASE = "https://api.github.com"
-
-
-def _headers():
-    h = {
-        "Accept": "application/vnd.github+json",
-        "User-Agent": "backboard-openproject-assistant",
-    }
-    print("GitHub token loaded:", bool(GITHUB_TOKEN))
-
-    if GITHUB_TOKEN:
-        h["Authorization"] = f"token {GITHUB_TOKEN}"
-    return h
 
 
 github_search_code_tool = {
     "type": "function",
     "function": {
         "name": "github_search_code",
-        "description": "Search for code files in a GitHub repository matching a query. Returns matching file paths and URLs.",
+        "description": "Search for code files in a GitHub repository matching a query (paths, identifiers and file contents). Returns matching file paths, URLs and the first matching line.",
         "parameters": {
             "type": "object",
             "properties": {
@@ -51,7 +39,7 @@ github_get_file_tool = {
     "type": "function",
     "function": {
         "name": "github_get_file",
-        "description": "Fetch a file's content from a GitHub repository (truncated).",
+        "description": "Fetch a file's content from a GitHub repository. Files larger than max_chars come back as an outline (headings, top-level definitions) plus the sections most relevant to query.",
         "parameters": {
             "type": "object",
             "properties": {
@@ -70,6 +58,10 @@ github_get_file_tool = {
                 "max_chars": {
                     "type": "integer",
                     "description": "Maximum characters to return (default 12000)."
+                },
+                "query": {
+                    "type": "string",
+                    "description": "What you are looking for in the file, used to pick sections of large files (e.g., 'database setup')."
                 }
             },
             "required": ["repo", "path"]
@@ -78,24 +70,101 @@ github_get_file_tool = {
 }
 
 
+github_get_files_tool = {
+    "type": "function",
+    "function": {
+        "name": "github_get_files",
+        "description": "Fetch several files from a GitHub repository in one call. Files larger than their max_chars come back as an outline plus the sections most relevant to query. Prefer this over repeated github_get_file calls, e.g. for README.md, the package manifest and the main entrypoints.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "repo": {
+                    "type": "string",
+                    "description": "GitHub repo in the form owner/repo (e.g., octocat/Hello-World)."
+                },
+                "files": {
+                    "type": "array",
+                    "description": "Files to fetch.",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "path": {
+                                "type": "string",
+                                "description": "File path within the repo (e.g., src/app.py)."
+                            },
+                            "max_chars": {
+                                "type": "integer",
+                                "description": "Maximum characters to return for this file."
+                            }
+                        },
+                        "required": ["path"]
+                    }
+                },
+                "ref": {
+                    "type": "string",
+                    "description": "Branch, tag, or commit SHA. Default 'main'."
+                },
+                "max_chars": {
+                    "type": "integer",
+                    "description": "Default maximum characters per file (default 12000)."
+                },
+                "query": {
+                    "type": "string",
+                    "description": "What you are looking for, used to pick sections of large files."
+                }
+            },
+            "required": ["repo", "files"]
+        }
+    }
+}
+
+
 def github_search_code(tc) -> dict[str, int]:
     args = tc.function.parsed_arguments
     repo = args["repo"]
     query = args["query"]
     limit = int(args.get("limit", 5))
 
+    # Served from the local index of the default branch whenever it can be built
+    try:
+        results = codeIndex.search(repo, query, limit)
+    except RateLimited as e:
+        results = None
+        print("Code index unavailable:", e)
+
+    if results is not None:
+        data = {
+            "repo": repo,
+            "query": query,
+            "count": len(results),
+            "results": results
+        }
+        return {
+            "tool_call_id": tc.id,
+            "output": json.dumps(data)
+        }
+
     # GitHub code search query
     q = f"{query} repo:{repo}"
     print(q)
 
-    url = f"{GITHUB_API_BASE}/search/code"
-    r = requests.get(url, headers=_headers(), params={"q": q, "per_page": limit}, timeout=20)
+    try:
+        # Results only change when the default branch moves, so key them by its SHA
+        sha = resolve_sha(repo, "HEAD")
 
-    if r.status_code != 200:
+        url = f"{GITHUB_API_BASE}/search/code"
+        status_code, body = cached_get(("search", repo, sha, query, limit), url, params={"q": q, "per_page": limit})
+    except RateLimited as e:
+        return {
+            "tool_call_id": tc.id,
+            "output": json.dumps({**e.to_dict(), "repo": repo, "query": query})
+        }
+
+    if status_code != 200:
         data = {
             "error": "GitHub search failed",
-            "status_code": r.status_code,
-            "details": r.text,
+            "status_code": status_code,
+            "details": body,
             "repo": repo,
             "query": query
         }
@@ -104,7 +173,7 @@ def github_search_code(tc) -> dict[str, int]:
             "output": json.dumps(data)
         }
 
-    payload = r.json()
+    payload = json.loads(body)
     items = payload.get("items", [])[:limit]
 
     results = []
@@ -129,38 +198,49 @@ def github_search_code(tc) -> dict[str, int]:
     }
 
 
-def github_get_file(tc) -> dict[str, int]:
-    args = tc.function.parsed_arguments
-    repo = args["repo"]
-    path = args["path"]
-    ref = args.get("ref", "main")
-    max_chars = int(args.get("max_chars", 12000))
+def _get_file_data(repo: str, path: str, ref: str, max_chars: int, sha: str = None, query: str = None) -> dict:
+    try:
+        # Content at a commit SHA never changes, so those entries skip the request entirely
+        if sha is None:
+            sha = resolve_sha(repo, ref)
 
-    url = f"{GITHUB_API_BASE}/repos/{repo}/contents/{path}"
-    r = requests.get(url, headers=_headers(), params={"ref": ref}, timeout=20)
+        snapshot = codeIndex.cached(repo, sha) if sha is not None else None
+        if snapshot is not None and path in snapshot.files:
+            return {
+                "repo": repo,
+                "path": path,
+                "ref": ref,
+                **shape_content(snapshot.files[path], max_chars, query),
+                "html_url": f"https://github.com/{repo}/blob/{sha}/{path}"
+            }
 
-    if r.status_code != 200:
-        data = {
+        url = f"{GITHUB_API_BASE}/repos/{repo}/contents/{path}"
+        status_code, body = cached_get(
+            ("contents", repo, sha or ref, path),
+            url,
+            params={"ref": sha or ref},
+            immutable=sha is not None
+        )
+    except RateLimited as e:
+        return {**e.to_dict(), "repo": repo, "path": path, "ref": ref}
+
+    if status_code != 200:
+        return {
             "error": "GitHub get file failed",
-            "status_code": r.status_code,
-            "details": r.text,
+            "status_code": status_code,
+            "details": body,
             "repo": repo,
             "path": path,
             "ref": ref
         }
-        return {
-            "tool_call_id": tc.id,
-            "output": json.dumps(data)
-        }
 
-    payload = r.json()
-    print(payload)
+    payload = json.loads(body)
 
     content_b64 = payload.get("content", "")
     encoding = payload.get("encoding", "")
 
     if encoding != "base64" or not content_b64:
-        data = {
+        return {
             "repo": repo,
             "path": path,
             "ref": ref,
@@ -168,21 +248,134 @@ def github_get_file(tc) -> dict[str, int]:
             "download_url": payload.get("download_url"),
             "html_url": payload.get("html_url"),
         }
+
+    raw = base64.b64decode(content_b64).decode("utf-8", errors="replace")
+
+    return {
+        "repo": repo,
+        "path": path,
+        "ref": ref,
+        **shape_content(raw, max_chars, query),
+        "html_url": payload.get("html_url")
+    }
+
+
+def github_get_file(tc) -> dict[str, int]:
+    args = tc.function.parsed_arguments
+    repo = args["repo"]
+    path = args["path"]
+    ref = args.get("ref", "main")
+    max_chars = int(args.get("max_chars", 12000))
+    query = args.get("query")
+
+    data = _get_file_data(repo, path, ref, max_chars, query=query)
+
+    return {
+        "tool_call_id": tc.id,
+        "output": json.dumps(data)
+    }
+
+
+def _graphql_blobs(repo: str, expressions: list[str]):
+    """Fetch several blobs in one GraphQL query, one aliased object(expression:) field each.
+
+    Returns a list aligned with expressions (None where the object is missing
+    or not a blob), or None when the query itself failed.
+    """
+    owner, name = repo.split("/", 1)
+    fields = " ".join(
+        f"f{i}: object(expression: $e{i}) {{ ... on Blob {{ text byteSize isBinary isTruncated }} }}"
+        for i in range(len(expressions))
+    )
+    params = " ".join(f"$e{i}: String!" for i in range(len(expressions)))
+    query = f"query($owner: String!, $name: String! {params}) {{ repository(owner: $owner, name: $name) {{ {fields} }} }}"
+
+    variables = {"owner": owner, "name": name}
+    variables.update({f"e{i}": expression for i, expression in enumerate(expressions)})
+
+    # Read-only query, safe to retry like a GET
+    r = scheduled_request("POST", GITHUB_GRAPHQL_URL, headers=github_headers(), json={"query": query, "variables": variables}, idempotent=True)
+    if r.status_code != 200:
+        print("GitHub GraphQL failed:", r.status_code, r.text)
+        return None
+
+    repository = (r.json().get("data") or {}).get("repository")
+    if repository is None:
+        return None
+    return [repository.get(f"f{i}") for i in range(len(expressions))]
+
+
+def github_get_files(tc) -> dict[str, int]:
+    args = tc.function.parsed_arguments
+    repo = args["repo"]
+    ref = args.get("ref", "main")
+    default_max_chars = int(args.get("max_chars", 12000))
+    query = args.get("query")
+    files = [f if isinstance(f, dict) else {"path": f} for f in args["files"]]
+
+    try:
+        sha = resolve_sha(repo, ref)
+    except RateLimited as e:
         return {
             "tool_call_id": tc.id,
-            "output": json.dumps(data)
+            "output": json.dumps({**e.to_dict(), "repo": repo, "ref": ref})
         }
 
-    raw = base64.b64decode(content_b64).decode("utf-8", errors="replace")
-    truncated = raw[:max_chars]
+    results = [None] * len(files)
+    missing = []
+    for i, f in enumerate(files):
+        max_chars = int(f.get("max_chars") or default_max_chars)
+        # Already local (code index snapshot or cached blob): no request needed
+        snapshot = codeIndex.cached(repo, sha) if sha is not None else None
+        cached = githubCache.get(("blob", repo, sha, f["path"])) if sha is not None else None
+        if snapshot is not None and f["path"] in snapshot.files:
+            results[i] = _get_file_data(repo, f["path"], ref, max_chars, sha, query)
+        elif cached is not None:
+            githubCache.record("hits")
+            results[i] = {"path": f["path"], **shape_content(cached["body"], max_chars, query)}
+        else:
+            missing.append(i)
+
+    blobs = None
+    if missing and GITHUB_TOKEN:
+        try:
+            blobs = _graphql_blobs(repo, [f"{sha or ref}:{files[i]['path']}" for i in missing])
+        except RateLimited as e:
+            print("GitHub GraphQL rate limited:", e)
+
+    for n, i in enumerate(missing):
+        path = files[i]["path"]
+        max_chars = int(files[i].get("max_chars") or default_max_chars)
+
+        if blobs is None:
+            # GraphQL needs a token, without one fall back to one contents call per file
+            results[i] = _get_file_data(repo, path, ref, max_chars, sha, query)
+            continue
+
+        blob = blobs[n]
+        if blob is None or blob.get("text") is None:
+            results[i] = {
+                "path": path,
+                "error": "File not found" if blob is None else "Binary or too large to return as text",
+            }
+            continue
+
+        githubCache.record("misses")
+        if sha is not None and not blob.get("isTruncated"):
+            githubCache.put(("blob", repo, sha, path), None, blob["text"])
+        results[i] = {"path": path, **shape_content(blob["text"], max_chars, query)}
+
+    # The shared fields live once at the top level
+    for result in results:
+        for key in ("repo", "ref"):
+            result.pop(key, None)
 
     data = {
         "repo": repo,
-        "path": path,
         "ref": ref,
-        "returned_chars": len(truncated),
-        "content": truncated,
-        "html_url": payload.get("html_url")
+        "sha": sha,
+        "count": len(results),
+        "files": results
     }
 
     return {
@@ -0,0 +1,52 @@
+from openproject import openproject
+from mirror import mirror
+from metadata import metadata
+import json
+
+list_tasks_tool = {
+        "type": "function",
+        "function": {
+            "name": "list_tasks",
+            "description": "List the tasks of a project with their dates, status and priority, optionally only those due in a date range or with a given status. Use this to read the current state of a project before changing it",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "projectName": {"type": "string", "description": "Project name"},
+                    "dueAfter": {"type": "string", "description": "Only tasks due on or after this date (YYYY-MM-DD)"},
+                    "dueBefore": {"type": "string", "description": "Only tasks due on or before this date (YYYY-MM-DD)"},
+                    "status": {"type": "string", "description": "Only tasks with this status (e.g. New, In progress, Closed)"},
+                    "limit": {"type": "integer", "description": "Maximum number of tasks to return (default 50)"}
+                },
+                "required": ["projectName"]
+            }
+        }
+    }
+
+async def list_tasks(tc) -> dict[str, int]:
+    # Get parsed arguments (required parameters are guaranteed by API)
+    args = tc.function.parsed_arguments
+    projectName = args["projectName"]
+    limit = args.get("limit") or 50
+    if args.get("status"):
+        metadata.validateStatus(args["status"])
+
+    # Answered from the local mirror, loaded on first use when the background sync is off
+    if mirror.syncedAt is None:
+        await mirror.sync(openproject)
+    projectId = await openproject.getProjectId(projectName)
+    tasks = mirror.tasks(projectId, args.get("dueAfter"), args.get("dueBefore"), args.get("status"))
+
+    tasksData = {
+        "projectName": projectName,
+        "count": len(tasks),
+        "tasks": [
+            {k: task[k] for k in ("subject", "startDate", "dueDate", "status", "priority", "percentageDone")}
+            for task in tasks[:limit]
+        ],
+        "truncated": len(tasks) > limit
+    }
+
+    return {
+        "tool_call_id": tc.id,
+        "output": json.dumps(tasksData)
+    }
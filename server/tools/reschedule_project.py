@@ -0,0 +1,36 @@
+from openproject import openproject
+import json
+
+reschedule_project_tool = {
+        "type": "function",
+        "function": {
+            "name": "reschedule_project",
+            "description": "Move the start and due dates of a project's tasks by a number of days in one call. Without a subject every task moves (optionally only those starting on or after fromDate). With a subject only that task moves and the tasks that follow it are pushed just as far as their dependencies require. Prefer this over several update_task calls",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "projectName": {"type": "string", "description": "Project name"},
+                    "days": {"type": "integer", "description": "Number of days to move the tasks by, negative to move them earlier"},
+                    "subject": {"type": "string", "description": "Only move this task and the tasks that depend on it"},
+                    "fromDate": {"type": "string", "description": "Only move tasks starting on or after this date (YYYY-MM-DD), ignored with subject"}
+                },
+                "required": ["projectName", "days"]
+            }
+        }
+    }
+
+async def reschedule_project(tc) -> dict[str, int]:
+    # Get parsed arguments (required parameters are guaranteed by API)
+    args = tc.function.parsed_arguments
+    projectName = args["projectName"]
+    days = int(args["days"])
+    subject = args.get("subject", None)
+    fromDate = args.get("fromDate", None)
+
+    # Call the actual function: one listing, then concurrent PATCHes
+    rescheduleData = await openproject.rescheduleProject(projectName, days, subject, fromDate)
+
+    return {
+        "tool_call_id": tc.id,
+        "output": json.dumps(rescheduleData)
+    }
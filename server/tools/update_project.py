@@ -1,4 +1,4 @@
-from test import updateProject
+from openproject import openproject
 import json
 
 update_project_tool = {
@@ -22,7 +22,7 @@ update_project_tool = {
 
 
 
-def update_project(tc) -> dict[str, int]:
+async def update_project(tc) -> dict[str, int]:
     # Get parsed arguments (required parameters are guaranteed by API)
     args = tc.function.parsed_arguments
     name = args["name"]
@@ -32,7 +32,7 @@ def update_project(tc) -> dict[str, int]:
     newStatusExplanation = args.get("newStatusExplanation", None)
 
     # Call the actual function to update the project
-    status_code = updateProject(name, newName, newPublic, newDescription, newStatusExplanation)
+    status_code = await openproject.updateProject(name, newName, newPublic, newDescription, newStatusExplanation)
 
     updateProjectData = {
         "name": name,
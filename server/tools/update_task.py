@@ -1,4 +1,4 @@
-from test import updateTask
+from openproject import openproject
 import json
 
 update_task_tool = {
@@ -22,7 +22,7 @@ update_task_tool = {
         }
     }
 
-def update_task(tc) -> dict[str, int]:
+async def update_task(tc) -> dict[str, int]:
     # Get parsed arguments (required parameters are guaranteed by API)
     args = tc.function.parsed_arguments
     projectName = args["projectName"]
@@ -34,7 +34,7 @@ def update_task(tc) -> dict[str, int]:
     newPriority = args.get("newPriority", None)
 
     # Call the actual function to update the task
-    status_code = updateTask(projectName, subject, newSubject, newDescription, newStartDate, newDueDate, newPriority)
+    status_code = await openproject.updateTask(projectName, subject, newSubject, newDescription, newStartDate, newDueDate, newPriority)
 
     updateTaskData = {
         "projectName": projectName,
@@ -0,0 +1,141 @@
+import contextvars
+import datetime
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+from config import BACKBOARD_API_KEY, OPENPROJECT_API_KEY, GITHUB_TOKEN, TRACE_DIR, TRACE_OUTPUT_CHARS
+
+
+# Things that look like credentials, replaced before anything reaches a trace file
+SECRET_RES = [
+    re.compile(r"-----BEGIN [A-Z ]*PRIVATE KEY-----.*?(-----END [A-Z ]*PRIVATE KEY-----|$)", re.S),
+    re.compile(r"\b(gh[pousr]_[A-Za-z0-9]{20,}|github_pat_[A-Za-z0-9_]{20,})\b"),
+    re.compile(r"\b(AKIA|ASIA)[A-Z0-9]{16}\b"),
+    re.compile(r"\bsk-[A-Za-z0-9_-]{20,}\b"),
+    re.compile(r"\bxox[abprs]-[A-Za-z0-9-]{10,}\b"),
+    re.compile(r"(?i)\b(bearer|token|basic)\s+[A-Za-z0-9._~+/=-]{16,}"),
+]
+
+# KEY=value / "api_key": "value" assignments, the key is kept so the trace stays readable
+ASSIGNMENT_RE = re.compile(r"(?i)\b([A-Z0-9_]*(?:secret|token|password|passwd|api_?key)[A-Z0-9_]*[\"']?\s*[=:]\s*)(\"[^\"]*\"|'[^']*'|[^\s,}]+)")
+
+
+def redact(text: str) -> str:
+    for secret in (BACKBOARD_API_KEY, OPENPROJECT_API_KEY, GITHUB_TOKEN):
+        if secret and len(secret) >= 8:
+            text = text.replace(secret, "[REDACTED]")
+    for pattern in SECRET_RES:
+        text = pattern.sub("[REDACTED]", text)
+    return ASSIGNMENT_RE.sub(r"\1[REDACTED]", text)
+
+
+def _redactValue(value):
+    if isinstance(value, str):
+        return redact(value)
+    if isinstance(value, list):
+        return [_redactValue(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _redactValue(v) for k, v in value.items()}
+    return value
+
+
+class RunTrace:
+    """One run as recorded: the message, every Backboard call's duration and the
+    tool calls requested after each of them, with their (redacted, truncated)
+    outputs and timings.
+
+    llm[i] is the duration of the i-th Backboard call (add_message, then one
+    submit_tool_outputs per round); rounds[i] are the tool calls it asked for.
+    """
+
+    def __init__(self, message: str, sessionId: str):
+        self.started = time.time()
+        self._start = time.perf_counter()
+        self.session = hashlib.sha256(sessionId.encode()).hexdigest()[:12]
+        self.message = redact(message)
+        self.llm = []
+        self.rounds = []
+        self.content = None
+        self.error = None
+        self.seconds = None
+        self._lock = threading.Lock()
+
+    def backboard(self, seconds: float):
+        self.llm.append(round(seconds, 4))
+
+    def round(self, toolCalls: list):
+        # One slot per call in the order the model asked for them, tools fill them as they finish
+        self.rounds.append({tc.id: {"id": tc.id, "name": tc.function.name, "args": _redactValue(tc.function.parsed_arguments)} for tc in toolCalls})
+
+    def tool(self, tc, result: dict, seconds: float):
+        output = result.get("output") or ""
+        with self._lock:
+            self.rounds[-1].setdefault(tc.id, {"id": tc.id, "name": tc.function.name}).update({
+                "seconds": round(seconds, 4),
+                "output_chars": len(output),
+                "output": redact(output[:TRACE_OUTPUT_CHARS]),
+            })
+
+    def finish(self, content: str = None, error: str = None):
+        self.seconds = round(time.perf_counter() - self._start, 4)
+        self.content = redact(content[:TRACE_OUTPUT_CHARS]) if content else content
+        self.error = error
+
+    def to_dict(self) -> dict:
+        return {
+            "v": 1,
+            "started": round(self.started, 3),
+            "session": self.session,
+            "message": self.message,
+            "seconds": self.seconds,
+            "llm": self.llm,
+            "rounds": [list(calls.values()) for calls in self.rounds],
+            "content": self.content,
+            "error": self.error,
+        }
+
+
+class TraceRecorder:
+    """Appends finished RunTraces to one JSON-lines file per day in directory.
+
+    Recording is opt-in: with no directory configured start() returns None
+    and nothing is captured.
+    """
+
+    def __init__(self, directory: str = TRACE_DIR):
+        self.directory = directory
+        self.counters = {"recorded": 0, "failed": 0}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.directory)
+
+    def start(self, message: str, sessionId: str):
+        return RunTrace(message, sessionId) if self.enabled else None
+
+    def write(self, trace: RunTrace):
+        line = json.dumps(trace.to_dict(), separators=(",", ":"))
+        path = os.path.join(self.directory, f"traces-{datetime.date.today().isoformat()}.jsonl")
+        try:
+            with self._lock:
+                os.makedirs(self.directory, exist_ok=True)
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+            self.counters["recorded"] += 1
+        except OSError as e:
+            self.counters["failed"] += 1
+            print("Trace write failed:", e)
+
+    def stats(self) -> dict:
+        return {"enabled": self.enabled, **self.counters}
+
+
+# Set per run in sendMessage(), None when recording is off
+currentTrace = contextvars.ContextVar("currentTrace", default=None)
+
+recorder = TraceRecorder()
@@ -0,0 +1,292 @@
+import asyncio
+import importlib.util
+import logging
+import random
+import threading
+import time
+
+import httpx
+
+from config import (
+    HTTP2,
+    CIRCUIT_FAILURES,
+    CIRCUIT_COOLDOWN,
+    OPENPROJECT_API_KEY,
+    OPENPROJECT_URL,
+    OPENPROJECT_CONNECT_TIMEOUT,
+    OPENPROJECT_READ_TIMEOUT,
+    OPENPROJECT_MAX_CONNECTIONS,
+    OPENPROJECT_RETRIES,
+    GITHUB_API_URL,
+    GITHUB_CONNECT_TIMEOUT,
+    GITHUB_READ_TIMEOUT,
+    GITHUB_MAX_CONNECTIONS,
+    GITHUB_RETRIES,
+)
+from metrics import circuitOpen, connectionsTotal, outboundSeconds, span
+
+logger = logging.getLogger(__name__)
+
+
+# One pooled HTTP transport per upstream, shared by the sync (GitHub tools) and
+# async (openproject.py) callers. Every upstream gets keep-alive connection
+# pools, connect/read timeouts, jittered exponential retries for requests
+# that are safe to repeat and a circuit breaker that fails fast
+# while the upstream is down.
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+# HTTP/2 needs the optional h2 package, without it the pools stay on HTTP/1.1
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+class CircuitOpen(Exception):
+    """The upstream failed too often lately, the request was not sent."""
+
+    def __init__(self, service: str, retryIn: float):
+        super().__init__(f"{service} is unavailable, retry in {retryIn:.0f}s")
+        self.service = service
+        self.retryIn = retryIn
+
+
+class CircuitBreaker:
+    """Opens after `failures` consecutive failed requests, lets one trial request
+    through once `cooldown` seconds have passed and closes again when it succeeds."""
+
+    def __init__(self, service: str, failures: int = CIRCUIT_FAILURES, cooldown: float = CIRCUIT_COOLDOWN):
+        self.service = service
+        self.failures = failures
+        self.cooldown = cooldown
+        self.opened = 0
+        self._consecutive = 0
+        self._openUntil = 0.0
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def before(self):
+        with self._lock:
+            if self._consecutive < self.failures:
+                return
+            now = time.monotonic()
+            if now < self._openUntil or self._trial:
+                raise CircuitOpen(self.service, max(0.0, self._openUntil - now))
+            # Half-open: this request is the trial, everyone else keeps failing fast
+            self._trial = True
+
+    def record(self, ok: bool):
+        with self._lock:
+            self._trial = False
+            if ok:
+                self._consecutive = 0
+                circuitOpen.set(0, service=self.service)
+                return
+            self._consecutive += 1
+            if self._consecutive >= self.failures:
+                if self._openUntil <= time.monotonic():
+                    self.opened += 1
+                self._openUntil = time.monotonic() + self.cooldown
+                circuitOpen.set(1, service=self.service)
+
+    def state(self) -> str:
+        with self._lock:
+            if self._consecutive < self.failures:
+                return "closed"
+            return "open" if time.monotonic() < self._openUntil else "half-open"
+
+
+class Upstream:
+    """Pooled sync and async clients for one upstream plus its retry policy and breaker.
+
+    The async client is created lazily on first use so it binds to the event
+    loop that actually uses it.
+    """
+
+    def __init__(self, service: str, baseUrl: str, auth=None, headers: dict = None, connectTimeout: float = 5,
+                 readTimeout: float = 30, maxConnections: int = 20, retries: int = 2,
+                 retryStatuses: set = frozenset({500, 502, 503, 504}), unprocessedStatuses: set = frozenset(),
+                 idempotentMethods: set = frozenset(IDEMPOTENT_METHODS), followRedirects: bool = False):
+        self.service = service
+        self.retries = retries
+        self.idempotentMethods = set(idempotentMethods)
+        self.retryStatuses = set(retryStatuses)
+        # Statuses where the server refused the request without processing it, safe to retry for any method
+        self.unprocessedStatuses = set(unprocessedStatuses)
+        self.breaker = CircuitBreaker(service)
+        self.counters = {"opened": 0, "reused": 0, "retries": 0, "rejected": 0}
+        self._options = {
+            "base_url": baseUrl,
+            "auth": auth,
+            "headers": headers,
+            "timeout": httpx.Timeout(readTimeout, connect=connectTimeout),
+            "limits": httpx.Limits(max_connections=maxConnections, max_keepalive_connections=maxConnections),
+            "http2": HTTP2 and HTTP2_AVAILABLE,
+            "follow_redirects": followRedirects,
+        }
+        self._sync = None
+        self._async = None
+        self._lock = threading.Lock()
+
+    def _client(self) -> httpx.Client:
+        with self._lock:
+            if self._sync is None:
+                self._sync = httpx.Client(**self._options)
+            return self._sync
+
+    def _asyncClient(self) -> httpx.AsyncClient:
+        if self._async is None:
+            self._async = httpx.AsyncClient(**self._options)
+        return self._async
+
+    def _connection(self, opened: bool):
+        kind = "opened" if opened else "reused"
+        with self._lock:
+            self.counters[kind] += 1
+        connectionsTotal.inc(service=self.service, kind=kind)
+
+    # --- retry policy ---
+    def _retryable(self, method: str, idempotent: bool, response: httpx.Response = None, error: Exception = None) -> bool:
+        if idempotent is None:
+            idempotent = method in self.idempotentMethods
+        if error is not None:
+            # A request that never got a connection was never sent
+            return idempotent or isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout))
+        if response.status_code in self.unprocessedStatuses:
+            return True
+        return idempotent and response.status_code in self.retryStatuses
+
+    @staticmethod
+    def _backoff(attempt: int, response: httpx.Response = None) -> float:
+        retryAfter = response.headers.get("Retry-After") if response is not None else None
+        if retryAfter and retryAfter.isdigit():
+            return float(retryAfter)
+        # Full jitter: anywhere up to the exponential step so retrying callers spread out
+        return random.uniform(0, min(8.0, 0.5 * 2 ** attempt))
+
+    def _failed(self, response: httpx.Response = None) -> bool:
+        return response is None or response.status_code >= 500
+
+    def _before(self):
+        try:
+            self.breaker.before()
+        except CircuitOpen:
+            with self._lock:
+                self.counters["rejected"] += 1
+            raise
+
+    # --- requests ---
+    def request(self, method: str, url: str, idempotent: bool = None, stream: bool = False, **kwargs) -> httpx.Response:
+        """Send a request (streamed responses must be closed by the caller).
+
+        idempotent overrides the method-based default, e.g. for a read-only
+        GraphQL POST.
+        """
+        self._before()
+        response = None
+        for attempt in range(self.retries + 1):
+            opened = []
+            kwargs.setdefault("extensions", {})["trace"] = lambda name, info: opened.append(name) if name == "connection.connect_tcp.complete" else None
+            error = None
+            try:
+                with span(outboundSeconds, service=self.service, method=method) as labels:
+                    client = self._client()
+                    response = client.send(client.build_request(method, url, **kwargs), stream=stream)
+                    labels["status"] = response.status_code
+            except httpx.TransportError as e:
+                error, response = e, None
+            if response is not None:
+                self._connection(bool(opened))
+
+            if attempt == self.retries or not self._retryable(method, idempotent, response, error):
+                break
+            logger.debug("%s %s %s failed (%r / %s), retrying", self.service, method, url, error, response.status_code if response is not None else "-")
+            with self._lock:
+                self.counters["retries"] += 1
+            if response is not None:
+                response.close()
+            time.sleep(self._backoff(attempt, response))
+
+        self.breaker.record(not self._failed(response))
+        if error is not None:
+            raise error
+        return response
+
+    def get(self, url: str, **kwargs) -> httpx.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> httpx.Response:
+        return self.request("POST", url, **kwargs)
+
+    def patch(self, url: str, **kwargs) -> httpx.Response:
+        return self.request("PATCH", url, **kwargs)
+
+    async def arequest(self, method: str, url: str, idempotent: bool = None, **kwargs) -> httpx.Response:
+        """asyncio counterpart of request()."""
+        self._before()
+        response = None
+        for attempt in range(self.retries + 1):
+            opened = []
+
+            async def trace(name, info):
+                if name == "connection.connect_tcp.complete":
+                    opened.append(name)
+
+            kwargs.setdefault("extensions", {})["trace"] = trace
+            error = None
+            try:
+                with span(outboundSeconds, service=self.service, method=method) as labels:
+                    response = await self._asyncClient().request(method, url, **kwargs)
+                    labels["status"] = response.status_code
+            except httpx.TransportError as e:
+                error, response = e, None
+            if response is not None:
+                self._connection(bool(opened))
+
+            if attempt == self.retries or not self._retryable(method, idempotent, response, error):
+                break
+            logger.debug("%s %s %s failed (%r / %s), retrying", self.service, method, url, error, response.status_code if response is not None else "-")
+            with self._lock:
+                self.counters["retries"] += 1
+            await asyncio.sleep(self._backoff(attempt, response))
+
+        self.breaker.record(not self._failed(response))
+        if error is not None:
+            raise error
+        return response
+
+    async def aclose(self):
+        if self._async is not None:
+            await self._async.aclose()
+            self._async = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self.counters, "circuit": self.breaker.state(), "http2": self._options["http2"]}
+
+
+openprojectHttp = Upstream(
+    "openproject",
+    OPENPROJECT_URL,
+    auth=("apikey", OPENPROJECT_API_KEY or ""),
+    headers={"Content-Type": "application/json"},
+    connectTimeout=OPENPROJECT_CONNECT_TIMEOUT,
+    readTimeout=OPENPROJECT_READ_TIMEOUT,
+    maxConnections=OPENPROJECT_MAX_CONNECTIONS,
+    retries=OPENPROJECT_RETRIES,
+    retryStatuses={429, 500, 502, 503, 504},
+    unprocessedStatuses={429, 503},
+    # Work package PATCHes carry a lockVersion (a replay gets a 409) and project PATCHes set
+    # absolute values, so both are as safe to repeat as a GET. POSTs could create duplicates.
+    idempotentMethods=IDEMPOTENT_METHODS | {"PATCH"},
+)
+
+# 403/429 rate limiting is left to githubScheduler, tarball downloads redirect to codeload
+githubHttp = Upstream(
+    "github",
+    GITHUB_API_URL,
+    connectTimeout=GITHUB_CONNECT_TIMEOUT,
+    readTimeout=GITHUB_READ_TIMEOUT,
+    maxConnections=GITHUB_MAX_CONNECTIONS,
+    retries=GITHUB_RETRIES,
+    retryStatuses={500, 502, 503, 504},
+    followRedirects=True,
+)